@@ -0,0 +1,35 @@
+"""Pydantic TypeAdapters for serializing list responses in one pydantic-core call."""
+
+from typing import Dict, List, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from .models.chat import Conversation, ModelInfo
+from .models.storage import ChatRecord, ChatSession
+from .models.tracing import TraceSpan, TraceSummary
+
+
+# Built at import so the first request doesn't pay for schema generation
+RECORDS = TypeAdapter(List[ChatRecord])
+SESSIONS = TypeAdapter(List[ChatSession])
+TRACES = TypeAdapter(List[TraceSummary])
+SPANS = TypeAdapter(List[TraceSpan])
+CONVERSATIONS = TypeAdapter(List[Conversation])
+MODELS = TypeAdapter(List[ModelInfo])
+
+_LIST_ADAPTERS: Dict[Type[BaseModel], TypeAdapter] = {
+    ChatRecord: RECORDS,
+    ChatSession: SESSIONS,
+    TraceSummary: TRACES,
+    TraceSpan: SPANS,
+    Conversation: CONVERSATIONS,
+    ModelInfo: MODELS,
+}
+
+
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Get the TypeAdapter for a list of the given model, creating it on first use."""
+    adapter = _LIST_ADAPTERS.get(model)
+    if adapter is None:
+        adapter = _LIST_ADAPTERS[model] = TypeAdapter(List[model])
+    return adapter
@@ -1,213 +1,203 @@
 """Chat API endpoints."""
 
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Query
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from ..models.chat import (
     ChatRequest, ChatResponse, Conversation, ModelInfo, ErrorResponse
 )
 from ..models.storage import ChatRecord, ChatSession
-from ..services.chat_service import chat_service
+from ..services.chat_service import ChatStream, chat_service
 from ..services.storage_service import storage_service
+from ..responses import PydanticResponse, dump_json, etag_response, make_etag
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+# Serialized storage views keyed by name: (storage revision, body, etag)
+_storage_payloads: Dict[str, Tuple[int, bytes, str]] = {}
+
+# Flush threshold when streaming large JSON arrays
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=1)
+def _models_payload() -> Tuple[bytes, str]:
+    """Serialize the model list once; adapters are fixed at startup."""
+    body = dump_json(chat_service.get_available_models())
+    return body, make_etag(body)
+
+
+def _storage_payload(key: str, producer: Callable[[], Any]) -> Tuple[bytes, str]:
+    """Serialize a storage view, reusing the cached bytes until storage changes."""
+    revision = storage_service.revision
+    cached = _storage_payloads.get(key)
+    if cached is None or cached[0] != revision:
+        body = dump_json(producer())
+        cached = (revision, body, make_etag(body))
+        _storage_payloads[key] = cached
+    return cached[1], cached[2]
+
+
+def _json_array(items: Iterable[bytes]) -> Iterator[bytes]:
+    """Stream already-serialized JSON values as one JSON array, in large chunks."""
+    buffer = bytearray(b"[")
+    first = True
+    for item in items:
+        if not first:
+            buffer += b","
+        buffer += item
+        first = False
+        if len(buffer) >= _STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
 
 @router.post("/send", response_model=ChatResponse)
 async def send_message(request: ChatRequest):
     """Send a chat message and get AI response."""
+    response = await chat_service.send_message(request)
+    return PydanticResponse(response)
+
+
+def _sse_event(event: str, data: Any) -> bytes:
+    """Encode one Server-Sent Event."""
+    return b"event: " + event.encode() + b"\ndata: " + dump_json(data) + b"\n\n"
+
+
+async def _stream_events(stream: ChatStream) -> AsyncIterator[bytes]:
+    """Relay a chat stream as start/delta/done SSE events."""
+    yield _sse_event("start", {"conversation_id": stream.conversation.id})
     try:
-        response = await chat_service.send_message(request)
-        return response
+        async for text in stream:
+            yield _sse_event("delta", {"content": text})
     except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+        # Headers are already sent, so report failures in-band
+        yield _sse_event("error", {"detail": str(e)})
+        return
+    yield _sse_event("done", stream.response())
 
 
-@router.get("/conversations", response_model=List[Conversation])
+@router.post("/send/stream")
+async def send_message_stream(request: ChatRequest):
+    """Send a chat message and stream the AI response as Server-Sent Events."""
+    stream = chat_service.start_stream(request)
+    return StreamingResponse(
+        _stream_events(stream),
+        media_type="text/event-stream",
+        # identity keeps GZipMiddleware from buffering the event stream
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"}
+    )
+
+
+@router.get("/conversations", responses={200: {"model": List[Conversation]}})
 async def get_conversations():
     """Get all conversations."""
-    try:
-        conversations = chat_service.get_all_conversations()
-        return conversations
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    conversations = chat_service.get_all_conversations()
+    return PydanticResponse(conversations)
 
 
 @router.get("/conversations/{conversation_id}", response_model=Conversation)
 async def get_conversation(conversation_id: str):
     """Get a specific conversation."""
-    try:
-        conversation = chat_service.get_conversation(conversation_id)
-        if not conversation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversation not found"
-            )
-        return conversation
-    except HTTPException:
-        raise
-    except Exception as e:
+    conversation = chat_service.get_conversation(conversation_id)
+    if not conversation:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
         )
+    return PydanticResponse(conversation)
 
 
 @router.post("/conversations", response_model=Conversation)
 async def create_conversation(title: str = None):
     """Create a new conversation."""
-    try:
-        conversation = chat_service.create_conversation(title)
-        return conversation
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    conversation = chat_service.create_conversation(title)
+    return PydanticResponse(conversation)
 
 
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation."""
-    try:
-        success = chat_service.delete_conversation(conversation_id)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversation not found"
-            )
-        return {"message": "Conversation deleted successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
+    success = chat_service.delete_conversation(conversation_id)
+    if not success:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
         )
+    return {"message": "Conversation deleted successfully"}
 
 
 @router.put("/conversations/{conversation_id}/title")
 async def update_conversation_title(conversation_id: str, title: str):
     """Update conversation title."""
-    try:
-        success = chat_service.update_conversation_title(conversation_id, title)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversation not found"
-            )
-        return {"message": "Conversation title updated successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
+    success = chat_service.update_conversation_title(conversation_id, title)
+    if not success:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
         )
+    return {"message": "Conversation title updated successfully"}
 
 
 @router.delete("/conversations/{conversation_id}/messages")
 async def clear_conversation(conversation_id: str):
     """Clear all messages from a conversation."""
-    try:
-        success = chat_service.clear_conversation(conversation_id)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversation not found"
-            )
-        return {"message": "Conversation cleared successfully"}
-    except HTTPException:
-        raise
-    except Exception as e:
+    success = chat_service.clear_conversation(conversation_id)
+    if not success:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
         )
+    return {"message": "Conversation cleared successfully"}
 
 
-@router.get("/models", response_model=List[ModelInfo])
-async def get_available_models():
+@router.get("/models", responses={200: {"model": List[ModelInfo]}})
+async def get_available_models(request: Request):
     """Get all available AI models."""
-    try:
-        models = chat_service.get_available_models()
-        return models
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    body, etag = _models_payload()
+    return etag_response(request, body, etag, "public, max-age=60")
 
 
 # Storage-related endpoints
-@router.get("/sessions", response_model=List[ChatSession])
-async def get_all_sessions():
+@router.get("/sessions", responses={200: {"model": List[ChatSession]}})
+async def get_all_sessions(request: Request):
     """Get all chat sessions."""
-    try:
-        sessions = storage_service.get_all_sessions()
-        return sessions
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    body, etag = _storage_payload("sessions", storage_service.get_all_sessions)
+    return etag_response(request, body, etag)
 
 
-@router.get("/sessions/{session_id}/records", response_model=List[ChatRecord])
+@router.get("/sessions/{session_id}/records", responses={200: {"model": List[ChatRecord]}})
 async def get_session_records(session_id: str):
     """Get all chat records for a specific session."""
-    try:
-        records = storage_service.get_session_records(session_id)
-        return records
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    records = storage_service.get_session_records(session_id)
+    return PydanticResponse(records)
 
 
-@router.get("/records", response_model=List[ChatRecord])
+@router.get("/records", responses={200: {"model": List[ChatRecord]}})
 async def get_all_records():
     """Get all chat records."""
-    try:
-        records = storage_service.get_all_records()
-        return records
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    # Records are stored as JSON already, so pass the bytes through unparsed
+    return StreamingResponse(
+        _json_array(storage_service.iter_raw_record_bytes()),
+        media_type="application/json"
+    )
 
 
-@router.get("/search", response_model=List[ChatRecord])
+@router.get("/search", responses={200: {"model": List[ChatRecord]}})
 async def search_records(
     query: str = Query(..., description="Search query"),
     session_id: Optional[str] = Query(None, description="Optional session ID to filter by")
 ):
     """Search chat records by text content."""
-    try:
-        records = storage_service.search_records(query, session_id)
-        return records
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    records = storage_service.search_records(query, session_id)
+    return PydanticResponse(records)
 
 
 @router.get("/stats")
-async def get_storage_stats():
+async def get_storage_stats(request: Request):
     """Get storage statistics."""
-    try:
-        stats = storage_service.get_stats()
-        return stats
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    body, etag = _storage_payload("stats", storage_service.get_stats)
+    return etag_response(request, body, etag)
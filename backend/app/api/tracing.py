@@ -1,65 +1,63 @@
 """Tracing API endpoints for listing traces and fetching details."""
 
-from typing import List, Dict, Any
-from fastapi import APIRouter, HTTPException
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Query
 
 from ..models.tracing import TraceSummary, TraceSpan
 from ..services.tracing_service import tracing_service
 from ..services.storage_service import storage_service
+from ..responses import PydanticResponse
 
 
 router = APIRouter(prefix="/api/tracing", tags=["tracing"])
 
 
-@router.get("/traces", response_model=List[TraceSummary])
-async def list_traces():
-    try:
-        return tracing_service.list_traces()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/traces", responses={200: {"model": List[TraceSummary]}})
+async def list_traces(
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of traces to return"),
+    offset: int = Query(0, ge=0, description="Number of newest traces to skip")
+):
+    traces = tracing_service.list_traces(limit, offset)
+    return PydanticResponse(traces)
 
 
-@router.get("/traces/{trace_id}", response_model=List[TraceSpan])
+@router.get("/traces/{trace_id}", responses={200: {"model": List[TraceSpan]}})
 async def get_trace(trace_id: str):
-    try:
-        return tracing_service.get_trace_spans(trace_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    spans = tracing_service.get_trace_spans(trace_id)
+    return PydanticResponse(spans)
 
 
 @router.get("/sessions/summary")
 async def get_sessions_with_first_messages():
     """Get sessions with their first user messages for better trace naming."""
-    try:
-        sessions = storage_service.get_all_sessions()
-        session_summaries = []
+    sessions = storage_service.get_all_sessions()
+    first_records = storage_service.get_first_records_bulk(
+        [session.session_id for session in sessions]
+    )
+    session_summaries = []
+    
+    for session in sessions:
+        first_record = first_records.get(session.session_id)
+        first_message = first_record.user_text if first_record else None
         
-        for session in sessions:
-            records = storage_service.get_session_records(session.session_id)
-            first_message = records[0].user_text if records else None
-            
-            # Create a meaningful title from first message
-            if first_message:
-                # Take first 50 chars and clean it up
-                title = first_message[:50].strip()
-                if len(first_message) > 50:
-                    title += "..."
-                # Remove newlines and extra spaces
-                title = " ".join(title.split())
-            else:
-                title = session.title
-                
-            session_summaries.append({
-                "session_id": session.session_id,
-                "title": title,
-                "original_title": session.title,
-                "first_message": first_message,
-                "created_at": session.created_at,
-                "message_count": session.message_count
-            })
+        # Create a meaningful title from first message
+        if first_message:
+            # First 50 chars with whitespace runs collapsed; split() also strips
+            title = " ".join(first_message[:50].split())
+            if len(first_message) > 50:
+                title += "..."
+        else:
+            title = session.title
         
-        return session_summaries
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        session_summaries.append({
+            "session_id": session.session_id,
+            "title": title,
+            "original_title": session.title,
+            "first_message": first_message,
+            "created_at": session.created_at,
+            "message_count": session.message_count
+        })
+    
+    return session_summaries
 
 
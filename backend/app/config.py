@@ -1,7 +1,8 @@
 """Configuration module for the chat application."""
 
 import os
-from typing import List
+from functools import cached_property
+from typing import List, Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -18,6 +19,8 @@ class Settings(BaseSettings):
     host: str = Field(default="0.0.0.0", env="HOST")
     port: int = Field(default=8000, env="PORT")
     debug: bool = Field(default=True, env="DEBUG")
+    # Storage and caches are per-process, so keep one worker unless they're shared
+    workers: int = Field(default=1, env="WORKERS")
     
     # CORS Configuration
     allowed_origins: str = Field(
@@ -29,10 +32,28 @@ class Settings(BaseSettings):
     enable_cache: bool = Field(default=True, env="ENABLE_CACHE")
     cache_dir: str = Field(default=".cache", env="CACHE_DIR")
     cache_ttl_seconds: int = Field(default=3600, env="CACHE_TTL_SECONDS")
+    response_cache_size: int = Field(default=1024, env="RESPONSE_CACHE_SIZE")
+    # Requests sampled hotter than this always go to the provider
+    response_cache_max_temperature: float = Field(default=0.3, env="RESPONSE_CACHE_MAX_TEMPERATURE")
     
-    @property
+    # Conversation Cache Configuration
+    max_hot_conversations: int = Field(default=256, env="MAX_HOT_CONVERSATIONS")
+    
+    # Storage Configuration
+    # Session activity is kept in memory and written out at this interval
+    session_flush_interval_seconds: float = Field(default=2.0, env="SESSION_FLUSH_INTERVAL_SECONDS")
+    
+    # Tracing Configuration
+    # "json" keeps a readable span log; "protobuf" writes compact OTLP records
+    trace_export_format: Literal["json", "protobuf"] = Field(default="json", env="TRACE_EXPORT_FORMAT")
+    
+    # Request Batching Configuration
+    batch_max_size: int = Field(default=8, env="BATCH_MAX_SIZE")
+    batch_max_wait_ms: int = Field(default=10, env="BATCH_MAX_WAIT_MS")
+    
+    @cached_property
     def origins_list(self) -> List[str]:
-        """Convert allowed_origins string to list."""
+        """Convert allowed_origins string to list (computed once)."""
         return [origin.strip() for origin in self.allowed_origins.split(",")]
     
     model_config = {
@@ -1,31 +1,102 @@
 """Main FastAPI application."""
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 import os
 
 from .config import settings
+from .responses import ORJSONResponse
 from .api.chat import router as chat_router
 from .api.tracing import router as tracing_router
+from .services.chat_service import chat_service
+from .services.storage_service import storage_service
 from .services.tracing_service import tracing_service
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+class ErrorDetailMiddleware:
+    """Turn unhandled route errors into a 500 ``{"detail": ...}`` response.
+
+    Installed inside CORSMiddleware so error responses still carry the CORS
+    headers; errors raised after a response has started are re-raised.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = False
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if started:
+                raise
+            response = ORJSONResponse(status_code=500, content={"detail": str(exc)})
+            await response(scope, receive, send)
+
+
+async def flush_sessions_periodically():
+    """Write batched session activity to disk at a fixed interval."""
+    while True:
+        await asyncio.sleep(settings.session_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(storage_service.flush_sessions)
+        except Exception:
+            # Keep flushing; the dirty sessions are retried next round
+            logger.exception("Failed to flush session activity")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    flusher = asyncio.create_task(flush_sessions_periodically())
+    yield
+    flusher.cancel()
+    try:
+        storage_service.flush_sessions()
+    except Exception:
+        # Still close the chat service below
+        logger.exception("Failed to flush session activity on shutdown")
+    await chat_service.aclose()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Observability Stack Chat API",
     description="Chat interface supporting OpenAI, Google Gemini, and Anthropic models",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Initialize tracing after app creation
 tracing_service.init_app(app)
 
+# Report route errors from inside the CORS layer
+app.add_middleware(ErrorDetailMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +106,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (record dumps, search results, trace spans)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include routers
 app.include_router(chat_router)
 app.include_router(tracing_router)
@@ -61,8 +135,8 @@ async def health_check():
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    """Global exception handler."""
-    return JSONResponse(
+    """Last-resort handler for errors raised outside ErrorDetailMiddleware."""
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -72,10 +146,14 @@ async def global_exception_handler(request, exc):
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=1 if settings.debug else settings.workers,
         reload=settings.debug
     )
@@ -5,6 +5,8 @@ from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from enum import Enum
 
+from ..utils import utcnow
+
 
 class ModelProvider(str, Enum):
     """Supported AI model providers."""
@@ -24,7 +26,7 @@ class ChatMessage(BaseModel):
     """Individual chat message."""
     role: ChatRole
     content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utcnow)
     model_used: Optional[str] = None
     reasoning: Optional[str] = None
 
@@ -45,7 +47,7 @@ class ChatResponse(BaseModel):
     message: str
     conversation_id: str
     model_used: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utcnow)
     usage: Optional[Dict[str, Any]] = None
     reasoning: Optional[str] = None
 
@@ -55,8 +57,10 @@ class Conversation(BaseModel):
     id: str
     title: str
     messages: List[ChatMessage] = Field(default_factory=list)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Kept alongside messages so listings can omit them
+    message_count: int = 0
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
 
 
 class ModelInfo(BaseModel):
@@ -73,4 +77,4 @@ class ErrorResponse(BaseModel):
     """Error response model."""
     error: str
     detail: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utcnow)
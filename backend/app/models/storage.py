@@ -4,6 +4,8 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from ..utils import utcnow
+
 
 class ChatRecord(BaseModel):
     """Chat record model for storage."""
@@ -11,7 +13,7 @@ class ChatRecord(BaseModel):
     session_id: str
     user_text: str
     response_text: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utcnow)
     metadata: dict = Field(default_factory=dict)
 
 
@@ -19,7 +21,9 @@ class ChatSession(BaseModel):
     """Chat session model for storage."""
     session_id: str
     title: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    last_activity: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
+    last_activity: datetime = Field(default_factory=utcnow)
     message_count: int = 0
+    # Records up to this time were cleared from the conversation view
+    cleared_at: Optional[datetime] = None
     metadata: dict = Field(default_factory=dict)
@@ -0,0 +1,63 @@
+"""Custom response classes for fast JSON serialization."""
+
+import hashlib
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from .adapters import list_adapter
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib encoder."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NAIVE_UTC)
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize a model, a list of models or plain data to JSON bytes."""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+    if isinstance(content, list):
+        if not content:
+            return b"[]"
+        if isinstance(content[0], BaseModel):
+            return list_adapter(type(content[0])).dump_json(content, by_alias=True)
+    return orjson.dumps(content, default=str)
+
+
+def make_etag(body: bytes) -> str:
+    """Build a strong ETag from a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str = "no-cache"
+) -> Response:
+    """Return a JSON body with caching headers, or 304 if the client has it."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+class PydanticResponse(Response):
+    """JSON response serialized by pydantic-core straight from models.
+
+    Accepts a single model or a homogeneous list of models and skips the
+    intermediate dict representation entirely.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
@@ -1,41 +1,122 @@
 """Anthropic Claude model adapter implementation."""
 
 import anthropic
-from typing import List, Dict, Any, Optional
+import httpx
+from typing import AsyncIterator, List, Dict, Any, Optional
 from ..models.chat import ChatMessage, ModelInfo, ModelProvider, ChatRole
 from .model_adapter import ModelAdapter
-from .tracing_service import tracing_service
+from .tracing_service import (
+    CHAT_MAX_TOKENS, CHAT_TEMPERATURE, MODEL_NAME, MODEL_PROVIDER, tracing_service
+)
+
+
+# Roles accepted in the Anthropic messages list; system goes in its own field
+_ALLOWED_ROLES = frozenset({ChatRole.USER, ChatRole.ASSISTANT})
+
+# Prompt-caching breakpoint; the prefix up to a marked block is cached server-side.
+# The pinned SDK (0.40) only types cache_control and the cache usage fields on
+# the prompt-caching beta resource, so requests go through client.beta.prompt_caching.
+_CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class AnthropicAdapter(ModelAdapter):
     """Anthropic Claude API adapter."""
     
+    AVAILABLE_MODELS = [
+        ModelInfo(
+            provider=ModelProvider.ANTHROPIC,
+            name="claude-3-opus-20240229",
+            display_name="Claude 3 Opus",
+            description="Most powerful model for complex tasks",
+            max_tokens=4096
+        ),
+        ModelInfo(
+            provider=ModelProvider.ANTHROPIC,
+            name="claude-3-sonnet-20240229",
+            display_name="Claude 3 Sonnet",
+            description="Balanced performance and speed",
+            max_tokens=4096
+        ),
+        ModelInfo(
+            provider=ModelProvider.ANTHROPIC,
+            name="claude-3-haiku-20240307",
+            display_name="Claude 3 Haiku",
+            description="Fastest model for simple tasks",
+            max_tokens=4096
+        )
+    ]
+    _MODEL_NAMES = frozenset(m.name for m in AVAILABLE_MODELS)
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
-        self.available_models = [
-            ModelInfo(
-                provider=ModelProvider.ANTHROPIC,
-                name="claude-3-opus-20240229",
-                display_name="Claude 3 Opus",
-                description="Most powerful model for complex tasks",
-                max_tokens=4096
-            ),
-            ModelInfo(
-                provider=ModelProvider.ANTHROPIC,
-                name="claude-3-sonnet-20240229",
-                display_name="Claude 3 Sonnet",
-                description="Balanced performance and speed",
-                max_tokens=4096
-            ),
-            ModelInfo(
-                provider=ModelProvider.ANTHROPIC,
-                name="claude-3-haiku-20240307",
-                display_name="Claude 3 Haiku",
-                description="Fastest model for simple tasks",
-                max_tokens=4096
-            )
+        # Explicit pool so concurrent chats reuse warm HTTP/2 connections
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, http_client=self._http)
+        self._messages = self.client.beta.prompt_caching.messages
+    
+    def _request_params(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        system_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build Anthropic request parameters from chat messages."""
+        # Convert messages to Anthropic format
+        anthropic_messages = [
+            {"role": msg.role.value, "content": msg.content}
+            for msg in messages
+            if msg.role in _ALLOWED_ROLES
         ]
+        
+        # Mark the end of the history so the next turn reads it from the prompt cache
+        if anthropic_messages:
+            last = anthropic_messages[-1]
+            last["content"] = [
+                {"type": "text", "text": last["content"], "cache_control": _CACHE_CONTROL}
+            ]
+        
+        # Prepare request parameters
+        request_params = {
+            "model": model,
+            "messages": anthropic_messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens or 1000
+        }
+        
+        # Add system prompt if provided
+        if system_prompt:
+            request_params["system"] = [
+                {"type": "text", "text": system_prompt, "cache_control": _CACHE_CONTROL}
+            ]
+        return request_params
+    
+    @staticmethod
+    def _usage(usage) -> Dict[str, Any]:
+        """Token usage in the shape the other adapters report.
+        
+        With prompt caching, ``input_tokens`` only counts uncached input;
+        cache reads and writes are added back so ``prompt_tokens`` means the
+        whole prompt, as it does for OpenAI and Gemini.
+        """
+        cache_read = usage.cache_read_input_tokens or 0
+        cache_creation = usage.cache_creation_input_tokens or 0
+        prompt_tokens = usage.input_tokens + cache_read + cache_creation
+        result = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": usage.output_tokens,
+            "total_tokens": prompt_tokens + usage.output_tokens
+        }
+        if cache_read:
+            result["cached_tokens"] = cache_read
+        if cache_creation:
+            result["cache_creation_tokens"] = cache_creation
+        return result
     
     async def chat_completion(
         self,
@@ -48,54 +129,58 @@ class AnthropicAdapter(ModelAdapter):
         """Generate chat completion using Anthropic Claude API."""
         try:
             tracer = tracing_service.tracer
-            # Convert messages to Anthropic format
-            anthropic_messages = []
-            
-            for msg in messages:
-                if msg.role in [ChatRole.USER, ChatRole.ASSISTANT]:
-                    anthropic_messages.append({
-                        "role": msg.role.value,
-                        "content": msg.content
-                    })
-            
-            # Prepare request parameters
-            request_params = {
-                "model": model,
-                "messages": anthropic_messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens or 1000
-            }
-            
-            # Add system prompt if provided
-            if system_prompt:
-                request_params["system"] = system_prompt
+            request_params = self._request_params(
+                messages, model, temperature, max_tokens, system_prompt
+            )
             
             # Make API call
             with tracer.start_as_current_span("anthropic.messages.create") as span:
-                span.set_attribute("model.provider", "anthropic")
-                span.set_attribute("model.name", model)
-                span.set_attribute("chat.temperature", temperature)
+                span.set_attribute(MODEL_PROVIDER, "anthropic")
+                span.set_attribute(MODEL_NAME, model)
+                span.set_attribute(CHAT_TEMPERATURE, temperature)
                 if max_tokens is not None:
-                    span.set_attribute("chat.max_tokens", max_tokens)
-                response = await self.client.messages.create(**request_params)
+                    span.set_attribute(CHAT_MAX_TOKENS, max_tokens)
+                response = await self._messages.create(**request_params)
+            
+            usage = self._usage(response.usage)
             
             return {
                 "content": response.content[0].text,
-                "usage": {
-                    "prompt_tokens": response.usage.input_tokens,
-                    "completion_tokens": response.usage.output_tokens,
-                    "total_tokens": response.usage.input_tokens + response.usage.output_tokens
-                },
+                "usage": usage,
                 "model": response.model
             }
             
         except Exception as e:
             raise Exception(f"Anthropic API error: {str(e)}")
     
-    def get_available_models(self) -> List[ModelInfo]:
-        """Get list of available Anthropic models."""
-        return self.available_models
+    async def stream_completion(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream chat completion text using Anthropic's streaming API."""
+        try:
+            tracer = tracing_service.tracer
+            request_params = self._request_params(
+                messages, model, temperature, max_tokens, system_prompt
+            )
+            
+            with tracer.start_as_current_span("anthropic.messages.stream") as span:
+                span.set_attribute(MODEL_PROVIDER, "anthropic")
+                span.set_attribute(MODEL_NAME, model)
+                span.set_attribute(CHAT_TEMPERATURE, temperature)
+                if max_tokens is not None:
+                    span.set_attribute(CHAT_MAX_TOKENS, max_tokens)
+                async with self._messages.stream(**request_params) as stream:
+                    async for text in stream.text_stream:
+                        yield text
+            
+        except Exception as e:
+            raise Exception(f"Anthropic API error: {str(e)}")
     
-    def validate_model(self, model: str) -> bool:
-        """Validate if model is available for Anthropic."""
-        return any(m.name == model for m in self.available_models)
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        await self._http.aclose()
@@ -1,26 +1,36 @@
 """Chat service for managing conversations and AI model interactions."""
 
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from cachetools import LRUCache
 from ..models.chat import (
     ChatMessage, ChatRequest, ChatResponse, Conversation, 
     ModelProvider, ChatRole, ModelInfo
 )
 from ..config import settings
+from ..utils import utcnow
 from .openai_adapter import OpenAIAdapter
 from .google_adapter import GoogleAdapter
 from .anthropic_adapter import AnthropicAdapter
+from .model_adapter import ModelAdapter
+from .request_batcher import RequestBatcher
+from .response_cache import ResponseCache
 from .storage_service import storage_service
-from .tracing_service import tracing_service
+from .tracing_service import (
+    CHAT_MAX_TOKENS, CHAT_TEMPERATURE, MODEL_NAME, MODEL_PROVIDER, tracing_service
+)
 
 
 class ChatService:
     """Service for managing chat conversations and AI model interactions."""
     
     def __init__(self):
-        self.conversations: Dict[str, Conversation] = {}
+        # Hot conversations only; cold ones are rebuilt from storage on demand
+        self.conversations: LRUCache = LRUCache(maxsize=settings.max_hot_conversations)
         self.model_adapters = {}
+        self.batchers: Dict[Tuple[ModelProvider, str], RequestBatcher] = {}
         
         # Initialize adapters only if API keys are provided
         if settings.openai_api_key:
@@ -31,6 +41,37 @@ class ChatService:
             self.model_adapters[ModelProvider.ANTHROPIC] = AnthropicAdapter(settings.anthropic_api_key)
         
         self.storage = storage_service
+        
+        self.response_cache: Optional[ResponseCache] = None
+        if settings.enable_cache:
+            self.response_cache = ResponseCache(
+                settings.cache_dir,
+                settings.cache_ttl_seconds,
+                max_size=settings.response_cache_size,
+                max_temperature=settings.response_cache_max_temperature
+            )
+    
+    def _get_batcher(self, provider: ModelProvider, model: str) -> RequestBatcher:
+        """Get the request batcher for a provider/model pair."""
+        key = (provider, model)
+        batcher = self.batchers.get(key)
+        if batcher is None:
+            batcher = RequestBatcher(
+                self.model_adapters[provider],
+                max_batch=settings.batch_max_size,
+                max_wait_ms=settings.batch_max_wait_ms
+            )
+            self.batchers[key] = batcher
+        return batcher
+    
+    async def aclose(self):
+        """Stop the batchers and close all model adapters and the response cache."""
+        for batcher in self.batchers.values():
+            await batcher.aclose()
+        for adapter in self.model_adapters.values():
+            await adapter.aclose()
+        if self.response_cache is not None:
+            await self.response_cache.aclose()
     
     def get_available_models(self) -> List[ModelInfo]:
         """Get all available models from all providers."""
@@ -40,22 +81,68 @@ class ChatService:
         return models
     
     def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
-        """Get conversation by ID."""
-        return self.conversations.get(conversation_id)
+        """Get conversation by ID, rehydrating it from storage if not cached."""
+        conversation = self.conversations.get(conversation_id)
+        if conversation is not None:
+            return conversation
+        
+        session = self.storage.get_session(conversation_id)
+        if not session:
+            return None
+        
+        messages = []
+        for record in self.storage.get_session_records(conversation_id):
+            # Records from before the last clear stay in storage but not in the conversation
+            if session.cleared_at is not None and record.timestamp <= session.cleared_at:
+                continue
+            messages.append(ChatMessage.model_construct(
+                role=ChatRole.USER,
+                content=record.user_text,
+                timestamp=record.timestamp
+            ))
+            messages.append(ChatMessage.model_construct(
+                role=ChatRole.ASSISTANT,
+                content=record.response_text,
+                timestamp=record.timestamp
+            ))
+        
+        conversation = Conversation.model_construct(
+            id=session.session_id,
+            title=session.title,
+            messages=messages,
+            message_count=len(messages),
+            created_at=session.created_at,
+            updated_at=session.last_activity
+        )
+        self.conversations[conversation_id] = conversation
+        return conversation
     
     def get_all_conversations(self) -> List[Conversation]:
-        """Get all conversations."""
-        return list(self.conversations.values())
+        """Get all conversations as stubs without messages."""
+        stubs = []
+        for session in self.storage.get_all_sessions():
+            hot = self.conversations.get(session.session_id)
+            stubs.append(Conversation.model_construct(
+                id=session.session_id,
+                title=session.title,
+                messages=[],
+                # Sessions count stored records, each a user and an assistant message
+                message_count=hot.message_count if hot is not None else 2 * session.message_count,
+                created_at=session.created_at,
+                updated_at=session.last_activity
+            ))
+        return stubs
     
     def create_conversation(self, title: str = None) -> Conversation:
         """Create a new conversation."""
         # Create storage session
         session = self.storage.create_session(title)
         
-        conversation = Conversation(
+        conversation = Conversation.model_construct(
             id=session.session_id,
             title=session.title,
             messages=[],
+            message_count=0,
             created_at=session.created_at,
             updated_at=session.last_activity
         )
@@ -69,90 +156,139 @@ class ChatService:
         success = self.storage.delete_session(conversation_id)
         
         # Delete from memory
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.conversations.pop(conversation_id, None)
         
         return success
     
+    def _prepare_exchange(
+        self, request: ChatRequest, now: datetime
+    ) -> Tuple[Conversation, ModelAdapter]:
+        """Resolve the conversation and adapter for a request and record the user message."""
+        # Get or create conversation
+        conversation = None
+        if request.conversation_id:
+            conversation = self.get_conversation(request.conversation_id)
+        if conversation is None:
+            conversation = self.create_conversation()
+        
+        # Add user message to conversation
+        user_message = ChatMessage.model_construct(
+            role=ChatRole.USER,
+            content=request.message,
+            timestamp=now
+        )
+        conversation.messages.append(user_message)
+        conversation.message_count += 1
+        
+        # Get appropriate model adapter
+        adapter = self.model_adapters.get(request.model_provider)
+        if not adapter:
+            if request.model_provider not in [ModelProvider.OPENAI, ModelProvider.GOOGLE, ModelProvider.ANTHROPIC]:
+                raise ValueError(f"Unsupported model provider: {request.model_provider}")
+            else:
+                raise ValueError(f"API key not configured for {request.model_provider}. Please add the API key to your .env file.")
+        
+        # Validate model
+        if not adapter.validate_model(request.model_name):
+            raise ValueError(f"Invalid model: {request.model_name}")
+        
+        return conversation, adapter
+    
+    def _complete_exchange(
+        self,
+        request: ChatRequest,
+        conversation: Conversation,
+        content: str,
+        model_used: str,
+        reasoning: Optional[str],
+        now: datetime
+    ):
+        """Record the AI reply on the conversation and persist the exchange."""
+        # Add AI message to conversation
+        ai_message = ChatMessage.model_construct(
+            role=ChatRole.ASSISTANT,
+            content=content,
+            timestamp=now,
+            model_used=model_used,
+            reasoning=reasoning
+        )
+        conversation.messages.append(ai_message)
+        conversation.message_count += 1
+        
+        # Update conversation timestamp
+        conversation.updated_at = now
+        
+        # Store chat record in JSON format
+        self.storage.store_chat_record(
+            user_text=request.message,
+            response_text=content,
+            session_id=conversation.id
+        )
+    
     async def send_message(self, request: ChatRequest) -> ChatResponse:
         """Send a message and get AI response."""
+        # One clock read shared by every timestamp of this exchange
+        now = utcnow()
         try:
             tracer = tracing_service.tracer
             with tracer.start_as_current_span("chat.send_message") as span:
-                span.set_attribute("model.provider", request.model_provider.value)
-                span.set_attribute("model.name", request.model_name)
-                span.set_attribute("chat.temperature", request.temperature)
+                span.set_attribute(MODEL_PROVIDER, request.model_provider.value)
+                span.set_attribute(MODEL_NAME, request.model_name)
+                span.set_attribute(CHAT_TEMPERATURE, request.temperature)
                 if request.max_tokens is not None:
-                    span.set_attribute("chat.max_tokens", request.max_tokens)
+                    span.set_attribute(CHAT_MAX_TOKENS, request.max_tokens)
                 if request.system_prompt:
                     span.set_attribute("chat.has_system_prompt", True)
 
-                # Get or create conversation
-                if request.conversation_id and request.conversation_id in self.conversations:
-                    conversation = self.conversations[request.conversation_id]
-                else:
-                    conversation = self.create_conversation()
+                conversation, adapter = self._prepare_exchange(request, now)
                 span.set_attribute("conversation.id", conversation.id)
             
-                # Add user message to conversation
-                user_message = ChatMessage(
-                    role=ChatRole.USER,
-                    content=request.message,
-                    timestamp=datetime.utcnow()
-                )
-                conversation.messages.append(user_message)
-            
-                # Get appropriate model adapter
-                adapter = self.model_adapters.get(request.model_provider)
-                if not adapter:
-                    if request.model_provider not in [ModelProvider.OPENAI, ModelProvider.GOOGLE, ModelProvider.ANTHROPIC]:
-                        raise ValueError(f"Unsupported model provider: {request.model_provider}")
-                    else:
-                        raise ValueError(f"API key not configured for {request.model_provider}. Please add the API key to your .env file.")
-            
-                # Validate model
-                if not adapter.validate_model(request.model_name):
-                    raise ValueError(f"Invalid model: {request.model_name}")
-            
                 # Generate AI response
                 with tracer.start_as_current_span("model.chat_completion") as call_span:
-                    call_span.set_attribute("model.provider", request.model_provider.value)
-                    call_span.set_attribute("model.name", request.model_name)
+                    call_span.set_attribute(MODEL_PROVIDER, request.model_provider.value)
+                    call_span.set_attribute(MODEL_NAME, request.model_name)
                     call_span.set_attribute("conversation.id", conversation.id)
-                    ai_response = await adapter.chat_completion(
-                        messages=conversation.messages,
-                        model=request.model_name,
-                        temperature=request.temperature,
-                        max_tokens=request.max_tokens,
-                        system_prompt=request.system_prompt
-                    )
+                    cache_key = None
+                    ai_response = None
+                    if self.response_cache is not None:
+                        cache_key = self.response_cache.key(
+                            request.model_provider,
+                            request.model_name,
+                            conversation.messages,
+                            request.temperature,
+                            request.max_tokens,
+                            request.system_prompt
+                        )
+                        if cache_key is not None:
+                            ai_response = await self.response_cache.get(cache_key)
+                    call_span.set_attribute("chat.cache_hit", ai_response is not None)
+                    if ai_response is None:
+                        batcher = self._get_batcher(request.model_provider, request.model_name)
+                        ai_response = await batcher.submit(
+                            messages=conversation.messages,
+                            model=request.model_name,
+                            temperature=request.temperature,
+                            max_tokens=request.max_tokens,
+                            system_prompt=request.system_prompt
+                        )
+                        if cache_key is not None:
+                            self.response_cache.put(cache_key, ai_response)
             
-                # Add AI message to conversation
-                ai_message = ChatMessage(
-                    role=ChatRole.ASSISTANT,
+                self._complete_exchange(
+                    request,
+                    conversation,
                     content=ai_response["content"],
-                    timestamp=datetime.utcnow(),
                     model_used=ai_response["model"],
-                    reasoning=ai_response.get("reasoning")
-                )
-                conversation.messages.append(ai_message)
-            
-                # Update conversation timestamp
-                conversation.updated_at = datetime.utcnow()
-            
-                # Store chat record in JSON format
-                self.storage.store_chat_record(
-                    user_text=request.message,
-                    response_text=ai_response["content"],
-                    session_id=conversation.id
+                    reasoning=ai_response.get("reasoning"),
+                    now=now
                 )
             
                             # Return response
-            return ChatResponse(
+            return ChatResponse.model_construct(
                 message=ai_response["content"],
                 conversation_id=conversation.id,
                 model_used=ai_response["model"],
-                timestamp=datetime.utcnow(),
+                timestamp=now,
                 usage=ai_response.get("usage"),
                 reasoning=ai_response.get("reasoning")
             )
@@ -160,22 +296,112 @@ class ChatService:
         except Exception as e:
             raise Exception(f"Error in chat service: {str(e)}")
     
+    def start_stream(self, request: ChatRequest) -> "ChatStream":
+        """Prepare a streamed exchange; iterating the result yields text and persists it at the end."""
+        now = utcnow()
+        conversation, adapter = self._prepare_exchange(request, now)
+        return ChatStream(self, request, conversation, adapter, now)
+    
     def update_conversation_title(self, conversation_id: str, title: str) -> bool:
         """Update conversation title."""
-        if conversation_id in self.conversations:
-            self.conversations[conversation_id].title = title
-            self.conversations[conversation_id].updated_at = datetime.utcnow()
+        conversation = self.get_conversation(conversation_id)
+        if conversation:
+            conversation.title = title
+            conversation.updated_at = utcnow()
+            # Persist so the title survives eviction from the hot cache
+            self.storage.update_session_title(conversation_id, title)
             return True
         return False
     
     def clear_conversation(self, conversation_id: str) -> bool:
         """Clear all messages from a conversation."""
-        if conversation_id in self.conversations:
-            self.conversations[conversation_id].messages = []
-            self.conversations[conversation_id].updated_at = datetime.utcnow()
+        conversation = self.get_conversation(conversation_id)
+        if conversation:
+            conversation.messages = []
+            conversation.message_count = 0
+            conversation.updated_at = utcnow()
+            # Persist so cleared messages aren't rehydrated after eviction
+            self.storage.clear_session(conversation_id)
             return True
         return False
 
 
+class ChatStream:
+    """A streamed AI reply for one exchange.
+    
+    Iterating yields text chunks from the provider; once the stream has
+    completed, the assembled reply is appended and stored within the same
+    span, which also records time to first chunk and time per chunk.
+    """
+    
+    def __init__(
+        self,
+        service: ChatService,
+        request: ChatRequest,
+        conversation: Conversation,
+        adapter: ModelAdapter,
+        now: datetime
+    ):
+        self.service = service
+        self.request = request
+        self.conversation = conversation
+        self.adapter = adapter
+        self.now = now
+        self.parts: List[str] = []
+    
+    async def __aiter__(self) -> AsyncIterator[str]:
+        request = self.request
+        tracer = tracing_service.tracer
+        with tracer.start_as_current_span("chat.send_message_stream") as span:
+            span.set_attribute(MODEL_PROVIDER, request.model_provider.value)
+            span.set_attribute(MODEL_NAME, request.model_name)
+            span.set_attribute("conversation.id", self.conversation.id)
+            started = time.perf_counter()
+            first_at = None
+            async for text in self.adapter.stream_completion(
+                messages=list(self.conversation.messages),
+                model=request.model_name,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                system_prompt=request.system_prompt
+            ):
+                if first_at is None:
+                    first_at = time.perf_counter()
+                    span.set_attribute("chat.ttft_ms", (first_at - started) * 1000)
+                self.parts.append(text)
+                yield text
+            
+            # Providers stream about one token per chunk, so chunks stand in for tokens
+            span.set_attribute("chat.chunk_count", len(self.parts))
+            if len(self.parts) > 1:
+                span.set_attribute(
+                    "chat.tpot_ms",
+                    (time.perf_counter() - first_at) * 1000 / (len(self.parts) - 1)
+                )
+            
+            self.service._complete_exchange(
+                request,
+                self.conversation,
+                content=self.content,
+                model_used=request.model_name,
+                reasoning=None,
+                now=self.now
+            )
+    
+    @property
+    def content(self) -> str:
+        """Text received so far."""
+        return "".join(self.parts)
+    
+    def response(self) -> ChatResponse:
+        """Build the final response for the completed stream."""
+        return ChatResponse.model_construct(
+            message=self.content,
+            conversation_id=self.conversation.id,
+            model_used=self.request.model_name,
+            timestamp=self.now
+        )
+
+
 # Global chat service instance
 chat_service = ChatService()
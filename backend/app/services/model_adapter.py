@@ -1,16 +1,23 @@
 """Base model adapter interface."""
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, FrozenSet, Optional
 from ..models.chat import ChatMessage, ModelInfo
 
 
 class ModelAdapter(ABC):
-    """Abstract base class for AI model adapters."""
+    """Abstract base class for AI model adapters.
+    
+    Subclasses list their models once at class level in ``AVAILABLE_MODELS``
+    with the matching ``_MODEL_NAMES`` set used for validation.
+    """
+    
+    AVAILABLE_MODELS: List[ModelInfo] = []
+    _MODEL_NAMES: FrozenSet[str] = frozenset()
     
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.available_models: List[ModelInfo] = []
+        self.available_models = self.AVAILABLE_MODELS
     
     @abstractmethod
     async def chat_completion(
@@ -24,10 +31,32 @@ class ModelAdapter(ABC):
         """Generate chat completion."""
         pass
     
+    async def stream_completion(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream chat completion text; by default yields the full completion at once."""
+        response = await self.chat_completion(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            system_prompt=system_prompt
+        )
+        yield response["content"]
+    
+    async def aclose(self):
+        """Release network resources held by the adapter."""
+        pass
+    
     def get_available_models(self) -> List[ModelInfo]:
         """Get list of available models."""
         return self.available_models
     
     def validate_model(self, model: str) -> bool:
         """Validate if model is available."""
-        return any(m.name == model for m in self.available_models)
+        return model in self._MODEL_NAMES
@@ -1,55 +1,105 @@
 """OpenAI model adapter implementation."""
 
 import openai
-from typing import List, Dict, Any, Optional
+import httpx
+from typing import AsyncIterator, List, Dict, Any, Optional
 from ..models.chat import ChatMessage, ModelInfo, ModelProvider, ChatRole
 from .model_adapter import ModelAdapter
-from .tracing_service import tracing_service
+from .tracing_service import (
+    CHAT_MAX_TOKENS, CHAT_TEMPERATURE, MODEL_NAME, MODEL_PROVIDER, tracing_service
+)
+
+
+# Plain role strings, looked up once instead of per-message enum access
+_ROLE = {
+    ChatRole.USER: "user",
+    ChatRole.ASSISTANT: "assistant",
+    ChatRole.SYSTEM: "system",
+}
 
 
 class OpenAIAdapter(ModelAdapter):
     """OpenAI API adapter."""
     
+    AVAILABLE_MODELS = [
+        ModelInfo(
+            provider=ModelProvider.OPENAI,
+            name="gpt-5-nano",
+            display_name="GPT-5 Nano",
+            description="Ultra-fast and efficient next-generation model",
+            max_tokens=8192
+        ),
+        ModelInfo(
+            provider=ModelProvider.OPENAI,
+            name="gpt-5-mini",
+            display_name="GPT-5 Mini",
+            description="Ultra-fast and efficient next-generation model",
+            max_tokens=8192
+        ),
+        ModelInfo(
+            provider=ModelProvider.OPENAI,
+            name="gpt-4-turbo-preview",
+            display_name="GPT-4 Turbo",
+            description="Latest GPT-4 model with improved performance",
+            max_tokens=4096
+        ),
+        ModelInfo(
+            provider=ModelProvider.OPENAI,
+            name="gpt-4",
+            display_name="GPT-4",
+            description="High-quality reasoning model",
+            max_tokens=8192
+        ),
+        ModelInfo(
+            provider=ModelProvider.OPENAI,
+            name="gpt-3.5-turbo",
+            display_name="GPT-3.5 Turbo",
+            description="Fast and efficient model",
+            max_tokens=4096
+        )
+    ]
+    _MODEL_NAMES = frozenset(m.name for m in AVAILABLE_MODELS)
+    
     def __init__(self, api_key: str):
         super().__init__(api_key)
-        self.client = openai.AsyncOpenAI(api_key=api_key)
-        self.available_models = [
-            ModelInfo(
-                provider=ModelProvider.OPENAI,
-                name="gpt-5-nano",
-                display_name="GPT-5 Nano",
-                description="Ultra-fast and efficient next-generation model",
-                max_tokens=8192
-            ),
-            ModelInfo(
-                provider=ModelProvider.OPENAI,
-                name="gpt-5-mini",
-                display_name="GPT-5 Mini",
-                description="Ultra-fast and efficient next-generation model",
-                max_tokens=8192
-            ),
-            ModelInfo(
-                provider=ModelProvider.OPENAI,
-                name="gpt-4-turbo-preview",
-                display_name="GPT-4 Turbo",
-                description="Latest GPT-4 model with improved performance",
-                max_tokens=4096
-            ),
-            ModelInfo(
-                provider=ModelProvider.OPENAI,
-                name="gpt-4",
-                display_name="GPT-4",
-                description="High-quality reasoning model",
-                max_tokens=8192
-            ),
-            ModelInfo(
-                provider=ModelProvider.OPENAI,
-                name="gpt-3.5-turbo",
-                display_name="GPT-3.5 Turbo",
-                description="Fast and efficient model",
-                max_tokens=4096
-            )
-        ]
+        # Explicit pool so concurrent and batched chats reuse warm HTTP/2 connections
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+            http2=True,
+            # The SDK adopts a custom client's timeout; keep its long read timeout
+            timeout=openai.DEFAULT_TIMEOUT
+        )
+        self.client = openai.AsyncOpenAI(api_key=api_key, http_client=self._http)
+    
+    def _request_params(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        system_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build OpenAI request parameters from chat messages."""
+        # Convert messages to OpenAI format. The system prompt goes first so the
+        # static prefix stays identical across turns for automatic prompt caching
+        openai_messages = (
+            [{"role": "system", "content": system_prompt}] if system_prompt else []
+        ) + [{"role": _ROLE[msg.role], "content": msg.content} for msg in messages]
+        
+        # Prepare request parameters
+        request_params = {
+            "model": model,
+            "messages": openai_messages,
+            "temperature": temperature
+        }
+        
+        # Handle max_tokens vs max_completion_tokens based on model
+        if max_tokens is not None:
+            if model.startswith("gpt-5"):
+                request_params["max_completion_tokens"] = max_tokens
+            else:
+                request_params["max_tokens"] = max_tokens
+        return request_params
     
     async def chat_completion(
         self,
@@ -62,44 +112,17 @@ class OpenAIAdapter(ModelAdapter):
         """Generate chat completion using OpenAI API."""
         try:
             tracer = tracing_service.tracer
-            # Convert messages to OpenAI format
-            openai_messages = []
-            
-            # Add system prompt if provided
-            if system_prompt:
-                openai_messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            # Add conversation messages
-            for msg in messages:
-                openai_messages.append({
-                    "role": msg.role.value,
-                    "content": msg.content
-                })
+            request_params = self._request_params(
+                messages, model, temperature, max_tokens, system_prompt
+            )
             
             # Make API call
             with tracer.start_as_current_span("openai.chat.completions.create") as span:
-                span.set_attribute("model.provider", "openai")
-                span.set_attribute("model.name", model)
-                span.set_attribute("chat.temperature", temperature)
+                span.set_attribute(MODEL_PROVIDER, "openai")
+                span.set_attribute(MODEL_NAME, model)
+                span.set_attribute(CHAT_TEMPERATURE, temperature)
                 if max_tokens is not None:
-                    span.set_attribute("chat.max_tokens", max_tokens)
-                
-                # Prepare request parameters
-                request_params = {
-                    "model": model,
-                    "messages": openai_messages,
-                    "temperature": temperature
-                }
-                
-                # Handle max_tokens vs max_completion_tokens based on model
-                if max_tokens is not None:
-                    if model.startswith("gpt-5"):
-                        request_params["max_completion_tokens"] = max_tokens
-                    else:
-                        request_params["max_tokens"] = max_tokens
+                    span.set_attribute(CHAT_MAX_TOKENS, max_tokens)
                 
                 response = await self.client.chat.completions.create(**request_params)
             
@@ -112,24 +135,56 @@ class OpenAIAdapter(ModelAdapter):
             if model.startswith("gpt-5") and hasattr(message, 'reasoning') and message.reasoning:
                 reasoning = message.reasoning
             
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.total_tokens
+            }
+            details = response.usage.prompt_tokens_details
+            if details and details.cached_tokens:
+                usage["cached_tokens"] = details.cached_tokens
+            
             return {
                 "content": content,
                 "reasoning": reasoning,
-                "usage": {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens
-                },
+                "usage": usage,
                 "model": response.model
             }
             
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
     
-    def get_available_models(self) -> List[ModelInfo]:
-        """Get list of available OpenAI models."""
-        return self.available_models
+    async def stream_completion(
+        self,
+        messages: List[ChatMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream chat completion text using OpenAI's streaming API."""
+        try:
+            tracer = tracing_service.tracer
+            request_params = self._request_params(
+                messages, model, temperature, max_tokens, system_prompt
+            )
+            
+            with tracer.start_as_current_span("openai.chat.completions.stream") as span:
+                span.set_attribute(MODEL_PROVIDER, "openai")
+                span.set_attribute(MODEL_NAME, model)
+                span.set_attribute(CHAT_TEMPERATURE, temperature)
+                if max_tokens is not None:
+                    span.set_attribute(CHAT_MAX_TOKENS, max_tokens)
+                
+                response = await self.client.chat.completions.create(**request_params, stream=True)
+                async for chunk in response:
+                    # Trailing chunks (e.g. usage) may carry no choices
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
     
-    def validate_model(self, model: str) -> bool:
-        """Validate if model is available for OpenAI."""
-        return any(m.name == model for m in self.available_models)
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        await self._http.aclose()
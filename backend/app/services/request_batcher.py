@@ -0,0 +1,116 @@
+"""Asynchronous micro-batching of chat completion requests."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+
+from .model_adapter import ModelAdapter
+
+
+# (chat_completion kwargs, caller's tracing context, future for the result)
+_Pending = Tuple[Dict[str, Any], otel_context.Context, asyncio.Future]
+
+
+class RequestBatcher:
+    """Collect concurrent completions for one (provider, model) and dispatch them together.
+
+    A request that finds the queue empty is dispatched at once. When
+    others are already queued behind it, requests arriving within
+    ``max_wait_ms`` (up to ``max_batch``) join the same batch. None of the
+    providers expose a batch chat API, so a batch is fanned out with
+    ``asyncio.gather``; the win is one scheduling round for the whole burst
+    instead of one per request.
+    """
+
+    def __init__(self, adapter: ModelAdapter, max_batch: int = 8, max_wait_ms: float = 10):
+        self.adapter = adapter
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Strong references so running batches aren't garbage collected
+        self._inflight: Set[asyncio.Task] = set()
+        # Requests taken off the queue but not yet handed to a batch task
+        self._collecting: List[_Pending] = []
+        self._closed = False
+
+    async def submit(self, **kwargs) -> Dict[str, Any]:
+        """Queue a chat_completion call and wait for its result."""
+        if self._closed:
+            raise RuntimeError("Request batcher is closed")
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((kwargs, otel_context.get_current(), future))
+        return await future
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._collect())
+
+    async def _collect(self):
+        """Gather pending requests into batches and hand them off."""
+        while True:
+            batch: List[_Pending] = [await self._queue.get()]
+            self._collecting = batch
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Only a burst already in progress is worth holding back for
+            deadline = self._loop.time() + self.max_wait
+            while 1 < len(batch) < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Don't block collection of the next batch on slow provider calls
+            task = self._loop.create_task(self.run_batch(batch))
+            self._collecting = []
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def aclose(self):
+        """Stop the collector task and fail requests it hasn't dispatched."""
+        self._closed = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        pending = self._collecting
+        self._collecting = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Request batcher is closed"))
+
+    async def run_batch(self, batch: List[_Pending]):
+        """Dispatch one batch of requests concurrently."""
+        await asyncio.gather(*(self._run_one(item, len(batch)) for item in batch))
+
+    async def _run_one(self, item: _Pending, batch_size: int):
+        kwargs, ctx, future = item
+        token = otel_context.attach(ctx)
+        try:
+            trace.get_current_span().set_attribute("chat.batch_size", batch_size)
+            result = await self.adapter.chat_completion(**kwargs)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            otel_context.detach(token)
@@ -0,0 +1,85 @@
+"""Exact-match cache for chat completion responses."""
+
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional, Set
+
+import orjson
+from cachetools import TTLCache
+from diskcache import Cache
+
+from ..models.chat import ChatMessage, ModelProvider
+
+
+class ResponseCache:
+    """Cache completions keyed on everything that determines the reply.
+
+    Lookups hit an in-memory TTL cache first and fall back to a diskcache
+    store, so entries survive restarts. diskcache is SQLite-backed, so disk
+    reads run in a worker thread and disk writes in the background. Cached
+    replies are returned with ``usage["cached"]`` set. Requests sampled above
+    ``max_temperature`` are too random for a stored reply to stand in and
+    bypass the cache.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: int,
+        max_size: int = 1024,
+        max_temperature: float = 0.3
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self._memory: TTLCache = TTLCache(maxsize=max_size, ttl=ttl_seconds)
+        self._disk = Cache(cache_dir)
+        # Background disk writes, kept referenced until they finish
+        self._writes: Set[asyncio.Task] = set()
+
+    def key(
+        self,
+        provider: ModelProvider,
+        model: str,
+        messages: List[ChatMessage],
+        temperature: float,
+        max_tokens: Optional[int],
+        system_prompt: Optional[str]
+    ) -> Optional[str]:
+        """Cache key for a request, or None if it must not be cached."""
+        if temperature > self.max_temperature:
+            return None
+        # Message timestamps don't affect the reply, so they stay out of the key
+        payload = orjson.dumps([
+            provider,
+            model,
+            temperature,
+            max_tokens,
+            system_prompt,
+            [(msg.role, msg.content) for msg in messages],
+        ])
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response, marked so its usage isn't counted as spent."""
+        response = self._memory.get(key)
+        if response is None:
+            response = await asyncio.to_thread(self._disk.get, key)
+            if response is None:
+                return None
+            self._memory[key] = response
+        return {**response, "usage": {**(response.get("usage") or {}), "cached": True}}
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Cache a response; the disk write happens in the background."""
+        self._memory[key] = response
+        task = asyncio.create_task(
+            asyncio.to_thread(self._disk.set, key, response, expire=self.ttl_seconds)
+        )
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def aclose(self):
+        """Finish pending disk writes and close the on-disk store."""
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        self._disk.close()
@@ -0,0 +1,114 @@
+"""SQLite FTS5 full-text index over chat records."""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+
+
+class SearchIndex:
+    """Full-text index for chat records backed by an FTS5 virtual table.
+
+    The trigram tokenizer keeps the case-insensitive substring semantics of
+    a plain ``in`` check while letting SQLite answer from the index.
+    """
+
+    # Trigram MATCH needs at least this many characters
+    MIN_MATCH_LENGTH = 3
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL lets searches read while a record is being indexed; NORMAL sync
+        # is safe under WAL and the index can be rebuilt from the record logs
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chat_fts USING fts5("
+                "user_text, response_text, "
+                "record_id UNINDEXED, session_id UNINDEXED, "
+                "timestamp UNINDEXED, metadata UNINDEXED, "
+                "tokenize='trigram')"
+            )
+
+    @staticmethod
+    def _row_values(record: Dict[str, Any]) -> tuple:
+        return (
+            record.get('user_text', ''),
+            record.get('response_text', ''),
+            record.get('record_id'),
+            record.get('session_id'),
+            str(record.get('timestamp')),
+            orjson.dumps(record.get('metadata') or {}, default=str).decode(),
+        )
+
+    def count(self) -> int:
+        """Number of indexed records."""
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM chat_fts").fetchone()[0]
+
+    def add(self, record: Dict[str, Any]):
+        """Index a single chat record."""
+        self.add_many([record])
+
+    def add_many(self, records: Iterable[Dict[str, Any]]):
+        """Index several chat records in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO chat_fts "
+                "(user_text, response_text, record_id, session_id, timestamp, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._row_values(record) for record in records)
+            )
+
+    def delete_session(self, session_id: str):
+        """Drop all indexed records of a session."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chat_fts WHERE session_id = ?", (session_id,))
+
+    def rebuild(self, records: Iterable[Dict[str, Any]]):
+        """Replace the index contents with the given records."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chat_fts")
+        self.add_many(records)
+
+    def search(self, query: str, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find records whose user or response text contains the query."""
+        if len(query) >= self.MIN_MATCH_LENGTH:
+            # Quote as a single phrase so user input is never parsed as FTS syntax
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql = "SELECT * FROM chat_fts WHERE chat_fts MATCH ?"
+            params: List[Any] = [phrase]
+            order = " ORDER BY rank"
+        else:
+            pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            sql = (
+                "SELECT * FROM chat_fts "
+                "WHERE (user_text LIKE ? ESCAPE '\\' OR response_text LIKE ? ESCAPE '\\')"
+            )
+            params = [pattern, pattern]
+            order = " ORDER BY rowid"
+
+        if session_id:
+            sql += " AND session_id = ?"
+            params.append(session_id)
+
+        with self._lock:
+            rows = self._conn.execute(sql + order, params).fetchall()
+
+        return [
+            {
+                'record_id': row['record_id'],
+                'session_id': row['session_id'],
+                'user_text': row['user_text'],
+                'response_text': row['response_text'],
+                'timestamp': row['timestamp'],
+                'metadata': orjson.loads(row['metadata']),
+            }
+            for row in rows
+        ]
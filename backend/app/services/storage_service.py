@@ -1,56 +1,209 @@
 """JSON-based storage service for chat history."""
 
-import json
-import uuid
+import mmap
+import os
+import tempfile
+import threading
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Set, Tuple
 from pathlib import Path
 
+import orjson
+
 from ..models.storage import ChatRecord, ChatSession
+from ..utils import replacement_mode, utcnow, uuid7
+from .search_index import SearchIndex
 from .tracing_service import tracing_service
 
 
+# Stored data was validated when written, so reads skip validation
+def _record_from_dict(data: Dict[str, Any]) -> ChatRecord:
+    """Build a ChatRecord from its stored form."""
+    data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+    return ChatRecord.model_construct(**data)
+
+
+def _session_from_dict(data: Dict[str, Any]) -> ChatSession:
+    """Build a ChatSession from its stored form without touching the stored dict."""
+    cleared_at = data.get('cleared_at')
+    return ChatSession.model_construct(**{
+        **data,
+        'created_at': datetime.fromisoformat(data['created_at']),
+        'last_activity': datetime.fromisoformat(data['last_activity']),
+        'cleared_at': datetime.fromisoformat(cleared_at) if cleared_at else None,
+    })
+
+
 class StorageService:
-    """Service for storing chat history as JSON files."""
+    """Service for storing chat history on disk.
+    
+    Sessions are kept in memory and persisted to a JSON file on change;
+    chat records are appended to one NDJSON log per session, with an
+    in-memory index of line offsets for reads.
+    """
     
     def __init__(self, storage_dir: str = "data"):
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
         
         # Separate files for different data types
-        self.chat_records_file = self.storage_dir / "chat_records.json"
+        self.records_dir = self.storage_dir / "records"
+        self.records_dir.mkdir(exist_ok=True)
         self.sessions_file = self.storage_dir / "sessions.json"
+        # Single-file record store used before the per-session logs
+        self.chat_records_file = self.storage_dir / "chat_records.json"
+        
+        # Bumped on every write so callers can cache derived views
+        self.revision = 0
+        
+        # session_id -> (offset, length) of each record line in its log
+        self._index: Dict[str, List[Tuple[int, int]]] = {}
+        # Serializes writers; records are also stored from worker threads
+        self._write_lock = threading.RLock()
         
         # Ensure files exist
         self._ensure_files_exist()
+        self._sessions: Dict[str, Dict[str, Any]] = self._read_json(self.sessions_file)
+        # Sessions whose activity changed since sessions.json was last written
+        self._sessions_dirty: Set[str] = set()
+        self._build_index()
+        self._migrate_legacy_records()
+        
+        # Full-text index over chat records, rebuilt if it drifted from the logs
+        self.search_index = SearchIndex(self.storage_dir / "search.db")
+        total_records = sum(len(entries) for entries in self._index.values())
+        if self.search_index.count() != total_records:
+            self.search_index.rebuild(self._iter_record_dicts())
     
     def _ensure_files_exist(self):
         """Ensure storage files exist."""
-        if not self.chat_records_file.exists():
-            self._write_json(self.chat_records_file, [])
-        
         if not self.sessions_file.exists():
             self._write_json(self.sessions_file, {})
     
+    def _records_path(self, session_id: str) -> Path:
+        """Path of a session's record log."""
+        return self.records_dir / f"{session_id}.ndjson"
+    
+    def _build_index(self):
+        """Index the line offsets of every record log on disk."""
+        logs = []
+        for path in self.records_dir.glob("*.ndjson"):
+            entries = []
+            first_timestamp = ""
+            offset = 0
+            with open(path, 'r+b') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Drop a torn trailing line left by an interrupted append
+                        f.truncate(offset)
+                        break
+                    if line.strip():
+                        if not entries:
+                            first_timestamp = orjson.loads(line)['timestamp']
+                        entries.append((offset, len(line)))
+                    offset += len(line)
+            if entries:
+                logs.append((first_timestamp, path.stem, entries))
+        # glob() yields filesystem order; keep sessions in order of their first record
+        logs.sort()
+        for _, session_id, entries in logs:
+            self._index[session_id] = entries
+    
+    def _migrate_legacy_records(self):
+        """Move records from the old single-file store into per-session logs."""
+        if not self.chat_records_file.exists():
+            return
+        # A crash before the rename below reruns the migration on the next
+        # start; skip records that already reached their session logs
+        migrated: Dict[str, Set[str]] = {}
+        for record in self._read_json(self.chat_records_file):
+            session_id = record['session_id']
+            record_ids = migrated.get(session_id)
+            if record_ids is None:
+                record_ids = migrated[session_id] = {
+                    orjson.loads(line)['record_id'] for line in self._read_record_lines(session_id)
+                }
+            if record['record_id'] in record_ids:
+                continue
+            # Round-trip through the model so timestamps use the canonical format
+            record_data = ChatRecord(**record).model_dump()
+            self._append_record(session_id, record_data)
+            record_ids.add(record['record_id'])
+        self.chat_records_file.rename(self.chat_records_file.with_suffix(".json.migrated"))
+    
+    def _append_record(self, session_id: str, record_data: Dict[str, Any]):
+        """Append one record to its session log and index it."""
+        line = orjson.dumps(record_data, default=str) + b"\n"
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        fd = os.open(self._records_path(session_id), flags, 0o644)
+        try:
+            offset = os.fstat(fd).st_size
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        self._index.setdefault(session_id, []).append((offset, len(line)))
+        self.revision += 1
+    
+    def _read_record_lines(self, session_id: str) -> List[bytes]:
+        """Read the raw record lines of a session via its memory-mapped log."""
+        # Readers run in worker threads; snapshot the index and map the log
+        # under the write lock so appends and deletes can't race them
+        with self._write_lock:
+            entries = list(self._index.get(session_id, ()))
+            if not entries:
+                return []
+            try:
+                with open(self._records_path(session_id), 'rb') as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                # Deleted between the index lookup and the open
+                return []
+        with mm:
+            return [mm[offset:offset + length] for offset, length in entries]
+    
+    def _iter_record_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all stored records as dicts, grouped by session."""
+        for raw in self.iter_raw_record_bytes():
+            yield orjson.loads(raw)
+    
     def _read_json(self, file_path: Path) -> Any:
         """Read JSON from file."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+            with open(file_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
             return [] if file_path == self.chat_records_file else {}
     
     def _write_json(self, file_path: Path, data: Any):
-        """Write JSON to file."""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, default=str, ensure_ascii=False)
+        """Write JSON to file atomically via a temp file and rename."""
+        fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=file_path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(data, default=str))
+            os.chmod(tmp_path, replacement_mode(file_path))
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.revision += 1
+    
+    def _save_sessions(self):
+        """Persist the in-memory sessions."""
+        self._write_json(self.sessions_file, self._sessions)
+        self._sessions_dirty.clear()
+    
+    def flush_sessions(self):
+        """Write out session activity updates still held in memory."""
+        with self._write_lock:
+            if self._sessions_dirty:
+                self._save_sessions()
     
     def create_session(self, title: Optional[str] = None) -> ChatSession:
         """Create a new chat session."""
         tracer = tracing_service.tracer
         with tracer.start_as_current_span("storage.create_session") as span:
-            session_id = str(uuid.uuid4())
-            now = datetime.utcnow()
+            session_id = str(uuid7())
+            now = utcnow()
             span.set_attribute("tool.name", "storage.create_session")
             span.set_attribute("session.id", session_id)
             if title:
@@ -64,59 +217,71 @@ class StorageService:
                 message_count=0
             )
             
-            # Load existing sessions
-            sessions = self._read_json(self.sessions_file)
-            
-            # Add new session
-            sessions[session.session_id] = session.model_dump()
-            
-            # Save sessions
-            self._write_json(self.sessions_file, sessions)
+            with self._write_lock:
+                self._sessions[session.session_id] = session.model_dump(mode="json")
+                self._save_sessions()
             
             return session
     
     def get_session(self, session_id: str) -> Optional[ChatSession]:
         """Get a chat session by ID."""
-        sessions = self._read_json(self.sessions_file)
-        session_data = sessions.get(session_id)
+        session_data = self._sessions.get(session_id)
         
         if session_data:
-            return ChatSession(**session_data)
+            return _session_from_dict(session_data)
         return None
     
     def get_all_sessions(self) -> List[ChatSession]:
         """Get all chat sessions."""
-        sessions = self._read_json(self.sessions_file)
-        return [ChatSession(**session_data) for session_data in sessions.values()]
+        return [_session_from_dict(session_data) for session_data in list(self._sessions.values())]
     
     def update_session_activity(self, session_id: str):
-        """Update session last activity timestamp."""
-        sessions = self._read_json(self.sessions_file)
-        
-        if session_id in sessions:
-            sessions[session_id]['last_activity'] = datetime.utcnow().isoformat()
-            sessions[session_id]['message_count'] = sessions[session_id].get('message_count', 0) + 1
-            self._write_json(self.sessions_file, sessions)
+        """Update session last activity timestamp; persisted by flush_sessions()."""
+        with self._write_lock:
+            session_data = self._sessions.get(session_id)
+            if session_data is not None:
+                session_data['last_activity'] = utcnow().isoformat()
+                session_data['message_count'] = session_data.get('message_count', 0) + 1
+                self._sessions_dirty.add(session_id)
+                self.revision += 1
+    
+    def update_session_title(self, session_id: str, title: str) -> bool:
+        """Update a session's title."""
+        with self._write_lock:
+            session_data = self._sessions.get(session_id)
+            if session_data is not None:
+                session_data['title'] = title
+                self._save_sessions()
+                return True
+        return False
+    
+    def clear_session(self, session_id: str) -> bool:
+        """Mark a session's records so far as cleared; the records themselves are kept."""
+        with self._write_lock:
+            session_data = self._sessions.get(session_id)
+            if session_data is not None:
+                session_data['cleared_at'] = utcnow().isoformat()
+                session_data['message_count'] = 0
+                self._save_sessions()
+                return True
+        return False
     
     def delete_session(self, session_id: str) -> bool:
         """Delete a chat session and its records."""
-        sessions = self._read_json(self.sessions_file)
-        
-        if session_id in sessions:
+        with self._write_lock:
+            if session_id not in self._sessions:
+                return False
+            
             # Remove session
-            del sessions[session_id]
-            self._write_json(self.sessions_file, sessions)
+            del self._sessions[session_id]
+            self._save_sessions()
             
             # Remove chat records for this session
-            records = self._read_json(self.chat_records_file)
-            records = [
-                record for record in records 
-                if record.get('session_id') != session_id
-            ]
-            self._write_json(self.chat_records_file, records)
+            if self._index.pop(session_id, None) is not None:
+                self._records_path(session_id).unlink(missing_ok=True)
+            self.search_index.delete_session(session_id)
             
             return True
-        return False
     
     def store_chat_record(self, user_text: str, response_text: str, session_id: str) -> ChatRecord:
         """Store a chat record."""
@@ -127,8 +292,8 @@ class StorageService:
             span.set_attribute("chat.user_text.size", len(user_text) if user_text else 0)
             span.set_attribute("chat.response_text.size", len(response_text) if response_text else 0)
 
-            record_id = str(uuid.uuid4())
-            now = datetime.utcnow()
+            record_id = str(uuid7())
+            now = utcnow()
             
             # Create chat record
             record = ChatRecord(
@@ -139,66 +304,65 @@ class StorageService:
                 timestamp=now
             )
             
-            # Load existing records
-            records = self._read_json(self.chat_records_file)
-            
-            # Add new record
-            records.append(record.model_dump())
-            
-            # Save records
-            self._write_json(self.chat_records_file, records)
-            
-            # Update session activity
-            self.update_session_activity(session_id)
+            with self._write_lock:
+                # Append to the session's record log
+                record_data = record.model_dump()
+                self._append_record(session_id, record_data)
+                self.search_index.add(record_data)
+                
+                # Update session activity
+                self.update_session_activity(session_id)
             
             return record
     
     def get_session_records(self, session_id: str) -> List[ChatRecord]:
         """Get all chat records for a session."""
-        records = self._read_json(self.chat_records_file)
-        session_records = [
-            ChatRecord(**record) for record in records
-            if record.get('session_id') == session_id
+        # Logs are append-only, so records are already in creation order
+        return [
+            _record_from_dict(orjson.loads(line))
+            for line in self._read_record_lines(session_id)
         ]
-        
-        # Sort by timestamp
-        session_records.sort(key=lambda x: x.timestamp)
-        return session_records
+    
+    def get_first_records_bulk(self, session_ids: List[str]) -> Dict[str, ChatRecord]:
+        """Get the earliest chat record for each of the given sessions."""
+        first: Dict[str, ChatRecord] = {}
+        for session_id in session_ids:
+            entries = self._index.get(session_id)
+            if not entries:
+                continue
+            # Logs are append-only, so the first line is the earliest record
+            offset, length = entries[0]
+            with open(self._records_path(session_id), 'rb') as f:
+                f.seek(offset)
+                first[session_id] = _record_from_dict(orjson.loads(f.read(length)))
+        return first
+    
+    def iter_raw_record_bytes(self) -> Iterator[bytes]:
+        """Iterate over the stored JSON of every record, grouped by session."""
+        for session_id in list(self._index):
+            for line in self._read_record_lines(session_id):
+                yield line.rstrip()
     
     def get_all_records(self) -> List[ChatRecord]:
-        """Get all chat records."""
-        records = self._read_json(self.chat_records_file)
-        return [ChatRecord(**record) for record in records]
+        """Get all chat records, grouped by session."""
+        return [_record_from_dict(record) for record in self._iter_record_dicts()]
     
     def search_records(self, query: str, session_id: Optional[str] = None) -> List[ChatRecord]:
-        """Search chat records by text content."""
-        records = self.get_all_records()
-        
-        # Filter by session if specified
-        if session_id:
-            records = [r for r in records if r.session_id == session_id]
-        
-        # Search in user input and response text
-        query_lower = query.lower()
-        matching_records = []
-        
-        for record in records:
-            if (query_lower in record.user_text.lower() or 
-                query_lower in record.response_text.lower()):
-                matching_records.append(record)
-        
-        return matching_records
+        """Search chat records by text content, best matches first."""
+        return [
+            _record_from_dict(record)
+            for record in self.search_index.search(query, session_id)
+        ]
     
     def get_stats(self) -> Dict[str, Any]:
         """Get storage statistics."""
-        records = self._read_json(self.chat_records_file)
-        sessions = self._read_json(self.sessions_file)
-        
         return {
-            "total_records": len(records),
-            "total_sessions": len(sessions),
+            "total_records": sum(len(entries) for entries in self._index.values()),
+            "total_sessions": len(self._sessions),
             "storage_dir": str(self.storage_dir),
-            "records_file_size": self.chat_records_file.stat().st_size if self.chat_records_file.exists() else 0,
+            "records_file_size": sum(
+                self._records_path(session_id).stat().st_size for session_id in self._index
+            ),
             "sessions_file_size": self.sessions_file.stat().st_size if self.sessions_file.exists() else 0
         }
 
@@ -1,143 +1,591 @@
-"""Tracing service built on OpenTelemetry with JSON persistence for UI."""
+"""Tracing service built on OpenTelemetry with JSON or protobuf persistence for UI."""
 
 from __future__ import annotations
 
-import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+from opentelemetry.proto.common.v1.common_pb2 import AnyValue
+from opentelemetry.proto.trace.v1.trace_pb2 import Span, Status
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import (
     SimpleSpanProcessor,
     BatchSpanProcessor,
     SpanExporter,
+    SpanExportResult,
 )
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 from opentelemetry.instrumentation.requests import RequestsInstrumentor
 
-from ..models.tracing import TraceSpan, TraceSummary
+from ..config import settings
+from ..models.tracing import TraceEvent, TraceSpan, TraceSummary
+from ..utils import replacement_mode
+
+
+logger = logging.getLogger(__name__)
+
+# Span attribute keys set on every model call; interned so the SDK's
+# attribute dicts hash and compare them by identity
+MODEL_PROVIDER = sys.intern("model.provider")
+MODEL_NAME = sys.intern("model.name")
+CHAT_TEMPERATURE = sys.intern("chat.temperature")
+CHAT_MAX_TOKENS = sys.intern("chat.max_tokens")
+
+
+def _iso_from_ns(ns: int) -> str:
+    """Format an epoch timestamp in nanoseconds as a naive UTC ISO string."""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{remainder // 1000:06d}"
+
+
+def _span_model(span_dict: Dict[str, Any]) -> TraceSpan:
+    """Build a TraceSpan from an exported span dict without re-validating it."""
+    return TraceSpan.model_construct(**{
+        **span_dict,
+        "start_time": datetime.fromisoformat(span_dict["start_time"]),
+        "end_time": datetime.fromisoformat(span_dict["end_time"]),
+        "events": [
+            TraceEvent.model_construct(**{
+                **event,
+                "timestamp": datetime.fromisoformat(event["timestamp"]),
+            })
+            for event in span_dict["events"]
+        ],
+    })
+
+
+@dataclass
+class _MutableSummary:
+    """Rolling aggregate of one trace, updated as its spans are exported.
+
+    Times are kept as ISO strings, which order the same as the instants.
+    """
+
+    trace_id: str
+    root_span_name: str
+    start_time: str
+    end_time: str
+    span_count: int = 0
+    conversation_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, entry: Dict[str, Any]) -> "_MutableSummary":
+        return cls(
+            trace_id=entry["trace_id"],
+            root_span_name=entry.get("root_span_name", "trace"),
+            start_time=entry["start_time"],
+            end_time=entry["end_time"],
+            span_count=int(entry.get("span_count", 0)),
+            conversation_id=entry.get("conversation_id"),
+            session_id=entry.get("session_id"),
+        )
+
+    def add(self, span_dict: Dict[str, Any]) -> None:
+        self.span_count += 1
+        # The earliest span names the trace
+        if span_dict["start_time"] < self.start_time:
+            self.start_time = span_dict["start_time"]
+            self.root_span_name = span_dict["name"]
+        if span_dict["end_time"] > self.end_time:
+            self.end_time = span_dict["end_time"]
+        # Optional conversation/session linkage
+        conv_id = span_dict["attributes"].get("conversation.id")
+        sess_id = span_dict["attributes"].get("session.id")
+        if conv_id:
+            self.conversation_id = conv_id
+        if sess_id:
+            self.session_id = sess_id
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    # Write to a temp file and rename so readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(data, default=str))
+        os.chmod(tmp_path, replacement_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _add_to_summary(summaries: Dict[str, _MutableSummary], span_dict: Dict[str, Any]) -> None:
+    """Fold one span into the summary of its trace."""
+    trace_id = span_dict["trace_id"]
+    summary = summaries.get(trace_id)
+    if summary is None:
+        summary = _MutableSummary(
+            trace_id=trace_id,
+            root_span_name=span_dict["name"],
+            start_time=span_dict["start_time"],
+            end_time=span_dict["end_time"],
+        )
+        summaries[trace_id] = summary
+    summary.add(span_dict)
 
 
 class JsonSpanExporter(SpanExporter):
-    """Custom exporter that mirrors spans into a JSON file for the UI."""
+    """Custom exporter that mirrors spans into JSON files for the UI.
+
+    export() only queues spans; a writer thread converts them in batches
+    of up to ``WRITE_BATCH_SIZE`` spans gathered over ``WRITE_BATCH_WAIT``
+    seconds. Spans are appended to a JSONL log and kept in memory; the
+    per-trace summaries are rewritten to traces.json at most every
+    ``TRACES_FLUSH_SPANS`` spans or ``TRACES_FLUSH_INTERVAL`` seconds.
+    """
+
+    TRACES_FLUSH_SPANS = 256
+    TRACES_FLUSH_INTERVAL = 5.0
+    WRITE_BATCH_SIZE = 512
+    WRITE_BATCH_WAIT = 0.05
 
     def __init__(self, export_dir: str = "data/traces"):
         self.export_dir = Path(export_dir)
         self.export_dir.mkdir(parents=True, exist_ok=True)
-        self.spans_file = self.export_dir / "spans.json"
+        self.spans_file = self.export_dir / "spans.jsonl"
         self.traces_file = self.export_dir / "traces.json"
+        # Whole-file span list used before the JSONL log
+        self.legacy_spans_file = self.export_dir / "spans.json"
         # Init files if missing
-        if not self.spans_file.exists():
-            self._write_json(self.spans_file, [])
+        self.spans_file.touch(exist_ok=True)
         if not self.traces_file.exists():
-            self._write_json(self.traces_file, {})
+            _write_json(self.traces_file, {})
+
+        # trace_id -> span dicts of the trace, ordered by start time
+        self._spans_by_trace: Dict[str, List[Dict[str, Any]]] = {}
+        self._span_count = 0
+        self._load_spans()
+        self._spans_fp = open(self.spans_file, "ab")
+        self._migrate_legacy_spans()
+
+        # Per-trace aggregates kept in memory so listing never rescans spans
+        self._summaries: Dict[str, _MutableSummary] = {}
+        for trace_id, entry in self._read_json(self.traces_file).items():
+            try:
+                self._summaries[trace_id] = _MutableSummary.from_json(entry)
+            except (KeyError, TypeError, ValueError):
+                continue
+        # traces.json lags the span log after a crash; rebuild it from the spans
+        if sum(summary.span_count for summary in self._summaries.values()) != self._span_count:
+            self._summaries = {}
+            for trace_spans in self._spans_by_trace.values():
+                for span_dict in trace_spans:
+                    _add_to_summary(self._summaries, span_dict)
+            self._write_traces()
+
+        self._unflushed_spans = 0
+        self._last_traces_flush = time.monotonic()
+
+        # Span batches, flush markers (Events) and the stop sentinel
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop = object()
+        self._stopped = False
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="json-span-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _load_spans(self) -> None:
+        offset = 0
+        with open(self.spans_file, "r+b") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Drop a torn trailing line left by an interrupted write
+                    f.truncate(offset)
+                    break
+                offset += len(line)
+                if line.strip():
+                    self._insert_span(orjson.loads(line))
+
+    def _migrate_legacy_spans(self) -> None:
+        if not self.legacy_spans_file.exists():
+            return
+        # A crash before the rename below reruns the migration on the next
+        # start; skip spans that already reached the JSONL log
+        seen = {
+            span_dict["span_id"]
+            for trace_spans in self._spans_by_trace.values()
+            for span_dict in trace_spans
+        }
+        legacy = []
+        for span_dict in self._read_json(self.legacy_spans_file):
+            if span_dict["span_id"] not in seen:
+                seen.add(span_dict["span_id"])
+                legacy.append(span_dict)
+        self._spans_fp.write(b"".join(orjson.dumps(span_dict) + b"\n" for span_dict in legacy))
+        self._spans_fp.flush()
+        for span_dict in legacy:
+            self._insert_span(span_dict)
+        self.legacy_spans_file.rename(self.legacy_spans_file.with_suffix(".json.migrated"))
+
+    def _insert_span(self, span_dict: Dict[str, Any]) -> None:
+        trace_spans = self._spans_by_trace.setdefault(span_dict["trace_id"], [])
+        # Spans arrive in roughly start order, so scan back from the end
+        i = len(trace_spans)
+        while i and trace_spans[i - 1]["start_time"] > span_dict["start_time"]:
+            i -= 1
+        trace_spans.insert(i, span_dict)
+        self._span_count += 1
 
     def _read_json(self, path: Path):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(path, "rb") as f:
+                return orjson.loads(f.read())
         except Exception:
-            return [] if path == self.spans_file else {}
-
-    def _write_json(self, path: Path, data: Any):
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, default=str, ensure_ascii=False)
+            return [] if path == self.legacy_spans_file else {}
+
+    def _write_traces(self) -> None:
+        _write_json(
+            self.traces_file,
+            {trace_id: summary.to_json() for trace_id, summary in list(self._summaries.items())},
+        )
+
+    def export(self, spans: List[ReadableSpan]) -> SpanExportResult:
+        if self._stopped:
+            return SpanExportResult.FAILURE
+        self._queue.put(list(spans))
+        return SpanExportResult.SUCCESS
 
-    def export(self, spans: List[ReadableSpan]) -> "opentelemetry.sdk.trace.export.SpanExportResult":
-        data = self._read_json(self.spans_file)
-        traces_index = self._read_json(self.traces_file)
+    def _writer_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            pending: List[ReadableSpan] = []
+            deadline = time.monotonic() + self.WRITE_BATCH_WAIT
+            # Keep gathering spans until the batch is full or the wait runs out
+            while isinstance(item, list):
+                pending.extend(item)
+                item = None
+                timeout = deadline - time.monotonic()
+                if len(pending) >= self.WRITE_BATCH_SIZE or timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if pending:
+                try:
+                    self._write_spans(pending)
+                except Exception:
+                    # Keep the writer alive; a failed batch only loses its spans
+                    logger.exception("Failed to write %d spans", len(pending))
+            if item is self._stop:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write_spans(self, spans: List[ReadableSpan]) -> None:
+        # Build and write the whole batch before touching the in-memory state,
+        # so a failure leaves memory matching the log
+        span_dicts: List[Dict[str, Any]] = []
+        lines: List[bytes] = []
 
         for span in spans:
             ctx = span.get_span_context()
-            trace_id_hex = ctx.trace_id.hex if hasattr(ctx.trace_id, "hex") else f"{ctx.trace_id:032x}"
-            span_id_hex = ctx.span_id.hex if hasattr(ctx.span_id, "hex") else f"{ctx.span_id:016x}"
-            parent_hex = (
-                span.parent.span_id.hex
-                if span.parent and hasattr(span.parent.span_id, "hex")
-                else (f"{span.parent.span_id:016x}" if span.parent else None)
-            )
-
-            span_model = TraceSpan(
-                span_id=span_id_hex,
-                trace_id=trace_id_hex,
-                parent_span_id=parent_hex,
-                name=span.name,
-                start_time=datetime.fromtimestamp(span.start_time / 1e9),
-                end_time=datetime.fromtimestamp(span.end_time / 1e9),
-                status_code=str(span.status.status_code.name if span.status else "UNSET"),
-                status_message=span.status.description if span.status else None,
-                attributes=dict(span.attributes or {}),
-                events=[
+            # OpenTelemetry ids are ints
+            trace_id_hex = f"{ctx.trace_id:032x}"
+            span_id_hex = f"{ctx.span_id:016x}"
+            parent_hex = f"{span.parent.span_id:016x}" if span.parent else None
+
+            # Same shape as TraceSpan, built directly; the schema is internal
+            span_dict = {
+                "span_id": span_id_hex,
+                "trace_id": trace_id_hex,
+                "parent_span_id": parent_hex,
+                "name": span.name,
+                "start_time": _iso_from_ns(span.start_time),
+                "end_time": _iso_from_ns(span.end_time),
+                "status_code": span.status.status_code.name if span.status else "UNSET",
+                "status_message": span.status.description if span.status else None,
+                "attributes": dict(span.attributes) if span.attributes else {},
+                "events": [
                     {
                         "name": e.name,
-                        "timestamp": datetime.fromtimestamp(e.timestamp / 1e9),
-                        "attributes": dict(e.attributes or {}),
+                        "timestamp": _iso_from_ns(e.timestamp),
+                        "attributes": dict(e.attributes) if e.attributes else {},
                     }
                     for e in span.events
                 ],
-                kind=str(span.kind.name) if span.kind else "INTERNAL",
-            )
-
-            span_dict = span_model.model_dump()
-            # Normalize timestamps to ISO strings for stable comparisons
-            if isinstance(span_dict.get("start_time"), datetime):
-                span_dict["start_time"] = span_dict["start_time"].isoformat()
-            if isinstance(span_dict.get("end_time"), datetime):
-                span_dict["end_time"] = span_dict["end_time"].isoformat()
-            for ev in span_dict.get("events", []):
-                if isinstance(ev.get("timestamp"), datetime):
-                    ev["timestamp"] = ev["timestamp"].isoformat()
-
-            data.append(span_dict)
-
-            # Update traces index
-            trace_id = span_dict["trace_id"]
-            entry = traces_index.get(trace_id) or {
-                "trace_id": trace_id,
-                "root_span_name": span_dict["name"],
-                "start_time": span_dict["start_time"],
-                "end_time": span_dict["end_time"],
-                "span_count": 0,
+                "kind": span.kind.name if span.kind else "INTERNAL",
+            }
+
+            span_dicts.append(span_dict)
+            lines.append(orjson.dumps(span_dict, default=str) + b"\n")
+
+        self._spans_fp.write(b"".join(lines))
+        self._spans_fp.flush()
+
+        for span_dict in span_dicts:
+            self._insert_span(span_dict)
+            # Update the rolling summary of the trace
+            _add_to_summary(self._summaries, span_dict)
+
+        self._unflushed_spans += len(spans)
+        if (
+            self._unflushed_spans >= self.TRACES_FLUSH_SPANS
+            or time.monotonic() - self._last_traces_flush >= self.TRACES_FLUSH_INTERVAL
+        ):
+            self._flush_traces()
+
+    def _flush_traces(self) -> None:
+        self._write_traces()
+        self._unflushed_spans = 0
+        self._last_traces_flush = time.monotonic()
+
+    def summaries(self) -> List[_MutableSummary]:
+        """Snapshot of the per-trace summaries."""
+        return list(self._summaries.values())
+
+    def get_spans_for_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Spans of one trace, ordered by start time."""
+        return list(self._spans_by_trace.get(trace_id, ()))
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Wait until every span queued so far has been written."""
+        if self._stopped:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout_millis / 1000)
+
+    def shutdown(self) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        # Drain what is queued, then persist the summaries
+        self._queue.put(self._stop)
+        self._writer.join()
+        if self._unflushed_spans:
+            self._flush_traces()
+        self._spans_fp.close()
+
+
+def _decode_value(value: AnyValue) -> Any:
+    kind = value.WhichOneof("value")
+    if kind == "array_value":
+        return [_decode_value(item) for item in value.array_value.values]
+    if kind == "kvlist_value":
+        return _decode_attributes(value.kvlist_value.values)
+    return getattr(value, kind) if kind else None
+
+
+def _decode_attributes(key_values) -> Dict[str, Any]:
+    return {kv.key: _decode_value(kv.value) for kv in key_values}
+
+
+def _span_dict_from_proto(span: Span) -> Dict[str, Any]:
+    """Convert an OTLP span into the exported span dict shape."""
+    return {
+        "span_id": span.span_id.hex(),
+        "trace_id": span.trace_id.hex(),
+        "parent_span_id": span.parent_span_id.hex() or None,
+        "name": span.name,
+        "start_time": _iso_from_ns(span.start_time_unix_nano),
+        "end_time": _iso_from_ns(span.end_time_unix_nano),
+        # STATUS_CODE_OK -> OK, matching the SDK's StatusCode names
+        "status_code": Status.StatusCode.Name(span.status.code).removeprefix("STATUS_CODE_"),
+        "status_message": span.status.message or None,
+        "attributes": _decode_attributes(span.attributes),
+        "events": [
+            {
+                "name": event.name,
+                "timestamp": _iso_from_ns(event.time_unix_nano),
+                "attributes": _decode_attributes(event.attributes),
+            }
+            for event in span.events
+        ],
+        "kind": Span.SpanKind.Name(span.kind).removeprefix("SPAN_KIND_"),
+    }
+
+
+class ProtobufSpanExporter(SpanExporter):
+    """Exporter that appends spans to a log of OTLP protobuf records.
+
+    Each export batch is written as one ``ExportTraceServiceRequest``
+    prefixed with its length as a 4-byte big-endian integer. Only the
+    per-trace summaries and the offsets of the records holding each trace
+    are kept in memory; spans are decoded from the memory-mapped log when
+    a trace is read. Summaries and offsets are saved to an index file at
+    most every ``TRACES_FLUSH_SPANS`` spans or ``TRACES_FLUSH_INTERVAL``
+    seconds, so startup only decodes the records written after that.
+    """
+
+    TRACES_FLUSH_SPANS = 256
+    TRACES_FLUSH_INTERVAL = 5.0
+
+    _LENGTH = struct.Struct(">I")
+
+    def __init__(self, export_dir: str = "data/traces"):
+        self.export_dir = Path(export_dir)
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        self.spans_file = self.export_dir / "spans.otlp"
+        self.index_file = self.export_dir / "spans.otlp.index.json"
+        self.spans_file.touch(exist_ok=True)
+
+        # trace_id -> (offset, length) of the records holding its spans
+        self._records_by_trace: Dict[str, List[Tuple[int, int]]] = {}
+        self._summaries: Dict[str, _MutableSummary] = {}
+        self._lock = threading.Lock()
+        self._stopped = False
+        # Byte length of the log covered by the saved index
+        self._indexed_size = self._load_index()
+        self._scan_records(self._indexed_size)
+        self._spans_fp = open(self.spans_file, "ab")
+
+        self._unflushed_spans = 0
+        self._last_index_flush = time.monotonic()
+
+    def _load_index(self) -> int:
+        try:
+            with open(self.index_file, "rb") as f:
+                index = orjson.loads(f.read())
+            log_size = index["log_size"]
+            if log_size > self.spans_file.stat().st_size:
+                # The log was truncated or replaced; the index no longer applies
+                return 0
+            summaries = {}
+            records_by_trace = {}
+            for trace_id, entry in index["traces"].items():
+                summaries[trace_id] = _MutableSummary.from_json(entry)
+                records_by_trace[trace_id] = [tuple(record) for record in entry["records"]]
+        except (OSError, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+            return 0
+        self._summaries = summaries
+        self._records_by_trace = records_by_trace
+        return log_size
+
+    def _scan_records(self, offset: int) -> None:
+        """Index the records from ``offset`` on, decoding only those."""
+        with open(self.spans_file, "r+b") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(self._LENGTH.size)
+                if not header:
+                    break
+                length = self._LENGTH.unpack(header)[0] if len(header) == self._LENGTH.size else None
+                payload = f.read(length) if length is not None else b""
+                if length is None or len(payload) < length:
+                    # Drop a torn trailing record left by an interrupted write
+                    f.truncate(offset)
+                    break
+                request = ExportTraceServiceRequest.FromString(payload)
+                start = offset + self._LENGTH.size
+                self._index_record(start, len(payload), map(_span_dict_from_proto, self._iter_spans(request)))
+                offset = start + len(payload)
+
+    @staticmethod
+    def _iter_spans(request: ExportTraceServiceRequest):
+        for resource_spans in request.resource_spans:
+            for scope_spans in resource_spans.scope_spans:
+                yield from scope_spans.spans
+
+    def _index_record(self, offset: int, length: int, span_dicts) -> None:
+        trace_ids = set()
+        for span_dict in span_dicts:
+            _add_to_summary(self._summaries, span_dict)
+            trace_ids.add(span_dict["trace_id"])
+        for trace_id in trace_ids:
+            self._records_by_trace.setdefault(trace_id, []).append((offset, length))
+
+    def _flush_index(self) -> None:
+        # Called with the lock held, after the log has been flushed
+        _write_json(self.index_file, {
+            "log_size": self._spans_fp.tell(),
+            "traces": {
+                trace_id: {**summary.to_json(), "records": self._records_by_trace.get(trace_id, [])}
+                for trace_id, summary in self._summaries.items()
+            },
+        })
+        self._unflushed_spans = 0
+        self._last_index_flush = time.monotonic()
+
+    def export(self, spans: List[ReadableSpan]) -> SpanExportResult:
+        if self._stopped:
+            return SpanExportResult.FAILURE
+        # Runs on the batch processor's worker thread, off the request path
+        payload = encode_spans(spans).SerializeToString()
+        # Summaries only need these fields, so skip decoding the record back
+        span_dicts = [
+            {
+                "trace_id": f"{span.get_span_context().trace_id:032x}",
+                "name": span.name,
+                "start_time": _iso_from_ns(span.start_time),
+                "end_time": _iso_from_ns(span.end_time),
+                "attributes": span.attributes or {},
             }
-            entry["span_count"] = int(entry.get("span_count", 0)) + 1
-            # Expand start/end bounds (ISO strings comparable lexicographically)
-            prev_start = entry.get("start_time")
-            prev_end = entry.get("end_time")
-            new_start = span_dict["start_time"]
-            new_end = span_dict["end_time"]
-            if not prev_start or new_start < prev_start:
-                entry["start_time"] = new_start
-                entry["root_span_name"] = span_dict["name"]
-            else:
-                entry["start_time"] = prev_start
-            if not prev_end or new_end > prev_end:
-                entry["end_time"] = new_end
-            else:
-                entry["end_time"] = prev_end
-
-            # Optional conversation/session linkage
-            conv_id = span_dict["attributes"].get("conversation.id")
-            sess_id = span_dict["attributes"].get("session.id")
-            if conv_id:
-                entry["conversation_id"] = conv_id
-            if sess_id:
-                entry["session_id"] = sess_id
-
-            traces_index[trace_id] = entry
-
-        self._write_json(self.spans_file, data)
-        self._write_json(self.traces_file, traces_index)
-
-        from opentelemetry.sdk.trace.export import SpanExportResult
+            for span in spans
+        ]
+        with self._lock:
+            offset = self._spans_fp.tell() + self._LENGTH.size
+            self._spans_fp.write(self._LENGTH.pack(len(payload)) + payload)
+            self._spans_fp.flush()
+            self._index_record(offset, len(payload), span_dicts)
+            self._unflushed_spans += len(spans)
+            if (
+                self._unflushed_spans >= self.TRACES_FLUSH_SPANS
+                or time.monotonic() - self._last_index_flush >= self.TRACES_FLUSH_INTERVAL
+            ):
+                self._flush_index()
         return SpanExportResult.SUCCESS
 
+    def summaries(self) -> List[_MutableSummary]:
+        """Snapshot of the per-trace summaries."""
+        return list(self._summaries.values())
+
+    def get_spans_for_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Spans of one trace, ordered by start time."""
+        with self._lock:
+            records = list(self._records_by_trace.get(trace_id, ()))
+        if not records:
+            return []
+        trace_id_bytes = bytes.fromhex(trace_id)
+        spans: List[Dict[str, Any]] = []
+        with open(self.spans_file, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset, length in records:
+                    request = ExportTraceServiceRequest.FromString(mm[offset:offset + length])
+                    spans.extend(
+                        _span_dict_from_proto(span)
+                        for span in self._iter_spans(request)
+                        if span.trace_id == trace_id_bytes
+                    )
+        spans.sort(key=lambda span_dict: span_dict["start_time"])
+        return spans
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Spans are written during export, so there is nothing to wait for."""
+        return True
+
     def shutdown(self) -> None:
-        return None
+        if self._stopped:
+            return
+        self._stopped = True
+        with self._lock:
+            if self._unflushed_spans:
+                self._flush_index()
+            self._spans_fp.close()
 
 
 class TracingService:
@@ -145,8 +593,12 @@ class TracingService:
 
     def __init__(self) -> None:
         self._initialized = False
-        self._exporter = JsonSpanExporter()
+        if settings.trace_export_format == "protobuf":
+            self._exporter: SpanExporter = ProtobufSpanExporter()
+        else:
+            self._exporter = JsonSpanExporter()
         self._provider: Optional[TracerProvider] = None
+        self._tracer: Optional[trace.Tracer] = None
 
     def init_app(self, app) -> None:
         if self._initialized:
@@ -161,6 +613,7 @@ class TracingService:
         # Use batch processor for efficiency
         self._provider.add_span_processor(BatchSpanProcessor(self._exporter))
         trace.set_tracer_provider(self._provider)
+        self._tracer = trace.get_tracer("observability.chat")
 
         # Instrument frameworks/clients
         FastAPIInstrumentor.instrument_app(app)
@@ -171,52 +624,33 @@ class TracingService:
 
     @property
     def tracer(self):
-        return trace.get_tracer("observability.chat")
+        if self._tracer is None:
+            # Not initialized yet; the proxy tracer follows the provider once set
+            return trace.get_tracer("observability.chat")
+        return self._tracer
 
     # Data accessors
-    def list_traces(self) -> List[TraceSummary]:
-        traces_path = self._exporter.traces_file
-        if not traces_path.exists():
-            return []
-        with open(traces_path, "r", encoding="utf-8") as f:
-            items = json.load(f)
-        summaries: List[TraceSummary] = []
-        for entry in items.values():
-            try:
-                summaries.append(TraceSummary(**entry))
-            except Exception:
-                # Fallback to raw dict if parsing fails
-                summaries.append(TraceSummary(
-                    trace_id=entry.get("trace_id"),
-                    root_span_name=entry.get("root_span_name", "trace"),
-                    session_id=entry.get("session_id"),
-                    conversation_id=entry.get("conversation_id"),
-                    start_time=datetime.fromisoformat(entry.get("start_time")),
-                    end_time=datetime.fromisoformat(entry.get("end_time")),
-                    span_count=int(entry.get("span_count", 0)),
-                ))
-        # Sort newest first
-        return sorted(summaries, key=lambda s: s.start_time, reverse=True)
+    def list_traces(self, limit: Optional[int] = None, offset: int = 0) -> List[TraceSummary]:
+        """Trace summaries newest first, optionally one page of them."""
+        # Sort on the ISO strings; trace ids are unique, so ties never compare summaries
+        entries = [
+            (summary.start_time, summary.trace_id, summary)
+            for summary in self._exporter.summaries()
+        ]
+        entries.sort(reverse=True)
+        end = None if limit is None else offset + limit
+        # Only the requested page is turned into response models
+        return [
+            TraceSummary.model_construct(**{
+                **vars(summary),
+                "start_time": datetime.fromisoformat(summary.start_time),
+                "end_time": datetime.fromisoformat(summary.end_time),
+            })
+            for _, _, summary in entries[offset:end]
+        ]
 
     def get_trace_spans(self, trace_id: str) -> List[TraceSpan]:
-        spans_path = self._exporter.spans_file
-        if not spans_path.exists():
-            return []
-        with open(spans_path, "r", encoding="utf-8") as f:
-            items = json.load(f)
-        spans: List[TraceSpan] = []
-        for item in items:
-            if item.get("trace_id") == trace_id:
-                try:
-                    spans.append(TraceSpan(**item))
-                except Exception:
-                    # Attempt coerce timestamps
-                    item["start_time"] = item.get("start_time")
-                    item["end_time"] = item.get("end_time")
-                    spans.append(TraceSpan(**item))
-        # Order by start_time
-        spans.sort(key=lambda s: s.start_time)
-        return spans
+        return [_span_model(item) for item in self._exporter.get_spans_for_trace(trace_id)]
 
 
 tracing_service = TracingService()
@@ -0,0 +1,64 @@
+"""Shared helpers."""
+
+import os
+import stat
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def utcnow() -> datetime:
+    """Current UTC time as a naive datetime, matching the stored timestamps.
+
+    Replaces the deprecated ``datetime.utcnow()``.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID version 7 (RFC 9562).
+
+    A 48-bit millisecond timestamp leads, followed by a 12-bit counter for
+    ids created within the same millisecond, so ids from this process sort
+    in creation order both as UUIDs and as strings.
+    """
+    global _uuid7_last_ms, _uuid7_counter
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _uuid7_last_ms:
+            _uuid7_counter = 0
+        else:
+            # Same millisecond, or the clock stepped back: keep counting up
+            ms = _uuid7_last_ms
+            _uuid7_counter += 1
+            if _uuid7_counter > 0xFFF:
+                ms += 1
+                _uuid7_counter = 0
+        _uuid7_last_ms = ms
+        counter = _uuid7_counter
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b)
+
+
+# Read once at import; os.umask() can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def replacement_mode(path: Path) -> int:
+    """Permission bits for a file about to replace ``path``.
+
+    Keeps the mode of the existing file, or uses the default for new files
+    under the umask; temp files from ``tempfile.mkstemp`` are always 0600.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
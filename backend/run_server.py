@@ -1,5 +1,6 @@
 """Run the FastAPI server."""
 
+import sys
 import uvicorn
 from app.main import app
 from app.config import settings
@@ -9,5 +10,8 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.host,
         port=settings.port,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=1 if settings.debug else settings.workers,
         reload=settings.debug
     )
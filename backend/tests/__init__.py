@@ -0,0 +1,10 @@
+"""Backend tests; run from backend/ with ``python -m unittest``."""
+
+import os
+import sys
+import tempfile
+
+# Services create their data files relative to the working directory on
+# import, so keep them out of the checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix="backend-tests-"))
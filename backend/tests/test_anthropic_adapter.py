@@ -0,0 +1,65 @@
+"""Tests for the Anthropic adapter."""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app.models.chat import ChatMessage, ChatRole
+from app.services.anthropic_adapter import AnthropicAdapter
+
+
+def _response(**usage):
+    return SimpleNamespace(
+        content=[SimpleNamespace(text="hello")],
+        model="claude-3-haiku-20240307",
+        usage=SimpleNamespace(**usage),
+    )
+
+
+class UsageTest(unittest.TestCase):
+    def setUp(self):
+        self.adapter = AnthropicAdapter("test-key")
+        self.addCleanup(asyncio.run, self.adapter.aclose())
+
+    def complete(self, response):
+        with mock.patch.object(
+            self.adapter._messages, "create", mock.AsyncMock(return_value=response)
+        ):
+            return asyncio.run(self.adapter.chat_completion(
+                [ChatMessage(role=ChatRole.USER, content="hi")],
+                "claude-3-haiku-20240307",
+                system_prompt="Be brief."
+            ))
+
+    def test_cache_tokens_count_towards_prompt(self):
+        result = self.complete(_response(
+            input_tokens=12,
+            output_tokens=5,
+            cache_read_input_tokens=900,
+            cache_creation_input_tokens=300,
+        ))
+        self.assertEqual(result["usage"], {
+            "prompt_tokens": 1212,
+            "completion_tokens": 5,
+            "total_tokens": 1217,
+            "cached_tokens": 900,
+            "cache_creation_tokens": 300,
+        })
+
+    def test_uncached_usage_has_no_cache_keys(self):
+        result = self.complete(_response(
+            input_tokens=12,
+            output_tokens=5,
+            cache_read_input_tokens=None,
+            cache_creation_input_tokens=0,
+        ))
+        self.assertEqual(result["usage"], {
+            "prompt_tokens": 12,
+            "completion_tokens": 5,
+            "total_tokens": 17,
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
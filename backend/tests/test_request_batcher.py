@@ -0,0 +1,46 @@
+"""Tests for the request batcher."""
+
+import asyncio
+import unittest
+
+from app.services.request_batcher import RequestBatcher
+
+
+class _EchoAdapter:
+    async def chat_completion(self, **kwargs):
+        return kwargs
+
+
+class RequestBatcherTest(unittest.TestCase):
+    def test_lone_request_is_dispatched(self):
+        async def run():
+            batcher = RequestBatcher(_EchoAdapter(), max_wait_ms=10_000)
+            try:
+                return await asyncio.wait_for(batcher.submit(model="m"), 1)
+            finally:
+                await batcher.aclose()
+
+        self.assertEqual(asyncio.run(run()), {"model": "m"})
+
+    def test_close_fails_undispatched_requests(self):
+        async def run():
+            batcher = RequestBatcher(_EchoAdapter(), max_batch=8, max_wait_ms=10_000)
+            # A burst keeps the collector waiting out its batch window
+            requests = [asyncio.create_task(batcher.submit(n=n)) for n in range(3)]
+            await asyncio.sleep(0.05)
+            await batcher.aclose()
+            results = await asyncio.wait_for(
+                asyncio.gather(*requests, return_exceptions=True), 1
+            )
+            with self.assertRaises(RuntimeError):
+                await batcher.submit(n=3)
+            return results
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertIsInstance(result, RuntimeError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -121,7 +121,7 @@ export const ConversationList: React.FC = () => {
                       {conversation.title}
                     </p>
                     <p className="text-xs text-gray-500">
-                      {conversation.messages.length} messages
+                      {conversation.message_count} messages
                     </p>
                   </div>
                 )}
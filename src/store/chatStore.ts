@@ -139,14 +139,14 @@ export const useChatStore = create<ChatState>((set, get) => ({
       await chatApi.clearConversation(conversationId);
       
       const conversations = get().conversations.map(c =>
-        c.id === conversationId ? { ...c, messages: [] } : c
+        c.id === conversationId ? { ...c, messages: [], message_count: 0 } : c
       );
       
       const currentConversation = get().currentConversation;
       set({
         conversations,
         ...(currentConversation?.id === conversationId && {
-          currentConversation: { ...currentConversation, messages: [] },
+          currentConversation: { ...currentConversation, messages: [], message_count: 0 },
         }),
       });
     } catch (error) {
@@ -29,6 +29,9 @@ export interface ChatResponse {
     prompt_tokens: number;
     completion_tokens: number;
     total_tokens: number;
+    cached_tokens?: number;
+    cache_creation_tokens?: number;
+    cached?: boolean;
   };
   reasoning?: string;
 }
@@ -37,6 +40,7 @@ export interface Conversation {
   id: string;
   title: string;
   messages: ChatMessage[];
+  message_count: number;
   created_at: string;
   updated_at: string;
 }